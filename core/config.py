@@ -26,7 +26,121 @@ class Settings(BaseSettings):
     # Security
     ALLOWED_HOSTS: str = os.getenv("ALLOWED_HOSTS", "*")
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "*")
-    RATE_LIMIT: str = "100/minute"
+    RATE_LIMIT: str = "100/minute"  # per client IP, all /api routes
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+    # memory | sqlite. The memory store is per worker, so with N workers a client
+    # effectively gets N times every limit; the default is sqlite whenever start.sh
+    # runs more than one worker (it exports WORKERS).
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "sqlite" if int(os.getenv("WORKERS", "1")) > 1 else "memory")
+    RATE_LIMIT_SQLITE_PATH: str = os.getenv("RATE_LIMIT_SQLITE_PATH", "cache/ratelimit.sqlite3")
+    RATE_LIMIT_PLAN_PATHS: str = os.getenv("RATE_LIMIT_PLAN_PATHS", "/api/v1/branding")  # POSTs here use the tier quota
+    SECURITY_RULES_FILE: str = os.getenv("SECURITY_RULES_FILE", "")  # JSON {name: regex}; empty = built-in rules
+    SECURITY_RULES_RELOAD_INTERVAL: float = float(os.getenv("SECURITY_RULES_RELOAD_INTERVAL", "5"))
+    SECURITY_SCAN_OVERLAP: int = int(os.getenv("SECURITY_SCAN_OVERLAP", "256"))  # chars carried across body chunks
+
+    # Outbound HTTP Pool
+    HTTP_POOL_LIMIT: int = int(os.getenv("HTTP_POOL_LIMIT", "100"))
+    HTTP_POOL_LIMIT_PER_HOST: int = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", "20"))
+    HTTP_KEEPALIVE_TIMEOUT: float = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", "30"))
+    HTTP_DNS_CACHE_TTL: int = int(os.getenv("HTTP_DNS_CACHE_TTL", "300"))
+
+    # Prompt Result Cache
+    PROMPT_CACHE_ENABLED: bool = os.getenv("PROMPT_CACHE_ENABLED", "True").lower() == "true"
+    PROMPT_CACHE_BACKEND: str = os.getenv("PROMPT_CACHE_BACKEND", "memory")  # memory | file
+    PROMPT_CACHE_TTL: int = int(os.getenv("PROMPT_CACHE_TTL", "900"))
+    PROMPT_CACHE_MAX_ENTRIES: int = int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "2048"))
+    PROMPT_CACHE_DIR: str = os.getenv("PROMPT_CACHE_DIR", "cache/prompts")
+
+    # Brand Context Cache (per-worker, in front of brand_contexts)
+    CONTEXT_CACHE_TTL: int = int(os.getenv("CONTEXT_CACHE_TTL", "60"))  # hits are revalidated against updated_at
+    CONTEXT_CACHE_MAX_ENTRIES: int = int(os.getenv("CONTEXT_CACHE_MAX_ENTRIES", "5000"))
+
+    # Batch Generation (/branding/batch)
+    BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    BATCH_PACK_SIZE: int = int(os.getenv("BATCH_PACK_SIZE", "5"))  # prompts per provider call when packing
+    # Items still running after this many seconds fail and are refunded; keep it
+    # under nginx's proxy_read_timeout and gunicorn's --timeout (both 120s)
+    BATCH_TIMEOUT: float = float(os.getenv("BATCH_TIMEOUT", "90"))
+
+    # Generated Image Storage (content-addressed, under STATIC_DIR)
+    IMAGE_STORE_PREFIX: str = os.getenv("IMAGE_STORE_PREFIX", "images")
+    IMAGE_RETENTION_DAYS: float = float(os.getenv("IMAGE_RETENTION_DAYS", "30"))  # 0 keeps images forever
+    IMAGE_STORE_MAX_BYTES: int = int(os.getenv("IMAGE_STORE_MAX_BYTES", "0"))  # 0 = no size cap
+    IMAGE_CLEANUP_INTERVAL: float = float(os.getenv("IMAGE_CLEANUP_INTERVAL", "3600"))  # 0 disables the sweep
+    IMAGE_CLEANUP_LOCK_FILE: str = os.getenv("IMAGE_CLEANUP_LOCK_FILE", "cache/image-cleanup.lock")  # one sweeping worker per host
+
+    # Blocking SDK Executors
+    GEMINI_EXECUTOR_WORKERS: int = int(os.getenv("GEMINI_EXECUTOR_WORKERS", "8"))
+    GEMINI_CALL_TIMEOUT: float = float(os.getenv("GEMINI_CALL_TIMEOUT", "45"))
+    IBM_EXECUTOR_WORKERS: int = int(os.getenv("IBM_EXECUTOR_WORKERS", "4"))
+    IBM_CALL_TIMEOUT: float = float(os.getenv("IBM_CALL_TIMEOUT", "60"))
+
+    # Background Jobs
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_MAX: int = int(os.getenv("JOB_QUEUE_MAX", "256"))
+    JOB_RESULT_TTL: int = int(os.getenv("JOB_RESULT_TTL", "3600"))
+    JOB_SHUTDOWN_GRACE: float = float(os.getenv("JOB_SHUTDOWN_GRACE", "20"))  # seconds to drain on shutdown; leftovers fail and are refunded
+    JOB_CALLBACK_ALLOWED_HOSTS: str = os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "")  # comma-separated; empty = any public host
+
+    # Provider Routing (sequential | hedged | race)
+    ROUTING_DEFAULT_MODE: str = os.getenv("ROUTING_DEFAULT_MODE", "sequential")
+    # Per-task overrides, e.g. "branding_names:hedged,content:hedged". Opt-in: a
+    # hedge can bill two providers for one request
+    ROUTING_TASK_MODES: str = os.getenv("ROUTING_TASK_MODES", "")
+    ROUTING_LATENCY_WINDOW: int = int(os.getenv("ROUTING_LATENCY_WINDOW", "200"))
+    HEDGE_MIN_SAMPLES: int = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_DEFAULT_DELAY: float = float(os.getenv("HEDGE_DEFAULT_DELAY", "3.0"))
+    HEDGE_MIN_DELAY: float = float(os.getenv("HEDGE_MIN_DELAY", "0.5"))
+    HEDGE_MAX_DELAY: float = float(os.getenv("HEDGE_MAX_DELAY", "15.0"))
+
+    # AI Call Admission (per-provider concurrency, tier-aware queueing)
+    SCHEDULER_POLICY: str = os.getenv("SCHEDULER_POLICY", "weighted")  # weighted | strict
+    SCHEDULER_MAX_QUEUE_WAIT: float = float(os.getenv("SCHEDULER_MAX_QUEUE_WAIT", "30"))
+    PROVIDER_MAX_CONCURRENCY: int = int(os.getenv("PROVIDER_MAX_CONCURRENCY", "16"))
+    PROVIDER_CONCURRENCY: str = os.getenv(
+        "PROVIDER_CONCURRENCY",
+        "GeminiProvider=8,OpenAIProvider=16,StableDiffusionProvider=4,HuggingFaceProvider=32,LocalSentimentProvider=32"
+    )
+
+    # Provider Circuit Breakers
+    BREAKER_WINDOW_SECONDS: float = float(os.getenv("BREAKER_WINDOW_SECONDS", "60"))
+    BREAKER_MIN_CALLS: int = int(os.getenv("BREAKER_MIN_CALLS", "5"))
+    BREAKER_ERROR_THRESHOLD: float = float(os.getenv("BREAKER_ERROR_THRESHOLD", "0.5"))
+    BREAKER_COOLDOWN_SECONDS: float = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "30"))
+    BREAKER_HALF_OPEN_PROBES: int = int(os.getenv("BREAKER_HALF_OPEN_PROBES", "1"))
+    BREAKER_SLOW_CALL_SECONDS: float = float(os.getenv("BREAKER_SLOW_CALL_SECONDS", "20"))
+
+    # Sentiment Batching (micro-batch window for single texts; local and HF backends)
+    HF_BATCH_WINDOW_MS: float = float(os.getenv("HF_BATCH_WINDOW_MS", "5"))
+    HF_MAX_BATCH_SIZE: int = int(os.getenv("HF_MAX_BATCH_SIZE", "32"))
+
+    # Sentiment Backend (remote = HF Inference API, local = in-process CPU model)
+    SENTIMENT_BACKEND: str = os.getenv("SENTIMENT_BACKEND", "remote")
+    LOCAL_SENTIMENT_MODEL: str = os.getenv("LOCAL_SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english")
+    LOCAL_SENTIMENT_ONNX: bool = os.getenv("LOCAL_SENTIMENT_ONNX", "False").lower() == "true"
+    LOCAL_SENTIMENT_THREADS: int = int(os.getenv("LOCAL_SENTIMENT_THREADS", "1"))
+    LOCAL_SENTIMENT_TIMEOUT: float = float(os.getenv("LOCAL_SENTIMENT_TIMEOUT", "10"))
+    LOCAL_SENTIMENT_LOAD_TIMEOUT: float = float(os.getenv("LOCAL_SENTIMENT_LOAD_TIMEOUT", "300"))
+
+    # Usage Log Pipeline
+    USAGE_LOG_QUEUE_SIZE: int = int(os.getenv("USAGE_LOG_QUEUE_SIZE", "10000"))
+    USAGE_LOG_BATCH_SIZE: int = int(os.getenv("USAGE_LOG_BATCH_SIZE", "200"))
+    USAGE_LOG_FLUSH_INTERVAL: float = float(os.getenv("USAGE_LOG_FLUSH_INTERVAL", "1.0"))
+    USAGE_LOG_OVERFLOW: str = os.getenv("USAGE_LOG_OVERFLOW", "block")  # block | drop
+    USAGE_LOG_BLOCK_TIMEOUT: float = float(os.getenv("USAGE_LOG_BLOCK_TIMEOUT", "0.5"))
+
+    # Password Hashing (tune BCRYPT_ROUNDS with: python -m modules.auth.hashing --target-ms 250)
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_POOL: str = os.getenv("PASSWORD_HASH_POOL", "thread")  # thread | process
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+    # Auth Principal Cache (0 TTL disables). Per worker: admin invalidation only
+    # reaches the worker that served it, so the TTL bounds how long a tier or
+    # is_active change takes to apply everywhere. Admin routes bypass the cache.
+    AUTH_PRINCIPAL_CACHE_TTL: float = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "30"))
+    AUTH_PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("AUTH_PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
 
     @field_validator("API_KEY", "HF_API_KEY")
     @classmethod
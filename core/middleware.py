@@ -1,63 +1,268 @@
 
 import time
+import math
+import codecs
 import logging
 import uuid
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import Optional, Tuple
+from jose import JWTError, jwt
+from sqlalchemy import select
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from core.config import settings
 from core.security import SecurityEngine
+from core.rate_limit import RateLimiter, parse_rate, headers_for
+from config.production import MAX_CONTENT_LENGTH
+from database import connection
+from database.models import User, UserTier
+from modules.auth.principal import PrincipalCache, UserPrincipal
+from modules.auth.service import SECRET_KEY, ALGORITHM
+from modules.plans.tiers import PLAN_LIMITS
 
 # Structured logging for production
 logger = logging.getLogger("brandcraft.middleware")
 
-class ProductionSecurityMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class ProductionSecurityMiddleware:
+    """
+    Pure ASGI middleware: tracing id, streaming input inspection and security headers.
+
+    POST/PUT bodies are scanned chunk by chunk as they arrive (each scan includes
+    an overlap tail from the previous chunk so patterns split across chunks are
+    still seen), oversized payloads are rejected before they are fully read, and
+    the accepted body is replayed to the app as a single message.
+
+    The raw-text pass covers JSON keys, values and structure alike, so it is
+    stricter than SecurityEngine's string-field scan. It can also flag a
+    pattern spanning two fields. Only an escape can hide a pattern from it,
+    so JSON bodies containing a backslash also get the field-by-field pass.
+    """
+
+    SCAN_METHODS = ("POST", "PUT")
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def _read_body(self, scope: Scope, receive: Receive, request_id: str):
+        """Returns (body, error_response)."""
+        headers = Headers(scope=scope)
+        declared = headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > MAX_CONTENT_LENGTH:
+            return None, _payload_too_large()
+
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        overlap = settings.SECURITY_SCAN_OVERLAP
+        tail = ""
+        chunks = []
+        size = 0
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None, None
+            chunk = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > MAX_CONTENT_LENGTH:
+                return None, _payload_too_large()
+            chunks.append(chunk)
+            text = tail + decoder.decode(chunk, final=not more_body)
+            rule = SecurityEngine.scan(text)
+            if rule:
+                return None, _blocked(scope, request_id, rule)
+            tail = text[-overlap:]
+
+        body = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        # Escapes (\uXXXX, \/ ...) can hide a pattern from the raw-text pass; only then decode the fields
+        if b"\\" in body and "json" in headers.get("content-type", ""):
+            rule = SecurityEngine.scan_body(body, "application/json")
+            if rule:
+                return None, _blocked(scope, request_id, rule)
+        return body, None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         # 1. Request Identity for Tracing
         request_id = str(uuid.uuid4())
-        request.state.request_id = request_id
+        scope.setdefault("state", {})["request_id"] = request_id
+        start_time = time.time()
 
         # 2. Input Security
-        if request.method in ["POST", "PUT"]:
+        if scope["method"] in self.SCAN_METHODS:
             try:
-                # Basic validation for early exit on malicious patterns
-                # Be careful with large bodies - here we just check for basic injection
-                body = await request.body()
-                content = body.decode("utf-8", errors="ignore")
-                if not SecurityEngine.validate_prompt(content):
-                    logger.warning(f"[{request_id}] Security Alert: Malicious payload blocked from {request.client.host}")
-                    return JSONResponse(
-                        status_code=403, 
-                        content={"error": "Security validation failed: Prohibited patterns detected."}
-                    )
+                body, rejection = await self._read_body(scope, receive, request_id)
             except Exception as e:
                 logger.error(f"[{request_id}] Content processing error: {e}")
+                body, rejection = None, JSONResponse(status_code=400, content={"error": "Malformed request body"})
+            if rejection is not None:
+                await rejection(scope, receive, send)
+                return
+            if body is not None:
+                receive = _replay(body, receive)
 
         # 3. Execution & Latency Tracking
-        start_time = time.time()
+        status_code = 500
+        response_started = False
+
+        async def send_with_headers(message: Message):
+            nonlocal status_code, response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                process_time = time.time() - start_time
+                # 4. Production Security Headers
+                headers = MutableHeaders(scope=message)
+                headers["X-Request-ID"] = request_id
+                headers["X-Process-Time"] = f"{process_time:.4f}s"
+                headers["X-Frame-Options"] = "DENY"
+                headers["X-Content-Type-Options"] = "nosniff"
+                headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+                logger.info(f"[{request_id}] {scope['method']} {scope['path']} - {status_code} ({process_time:.2f}s)")
+            await send(message)
+
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send_with_headers)
         except Exception as e:
             logger.error(f"[{request_id}] Unhandled Error: {str(e)}")
-            return JSONResponse(
+            if response_started:
+                raise
+            await JSONResponse(
                 status_code=500,
                 content={"error": "Internal server error", "trace_id": request_id}
-            )
-            
-        process_time = time.time() - start_time
-        
-        # 4. Production Security Headers
-        response.headers["X-Request-ID"] = request_id
-        response.headers["X-Process-Time"] = f"{process_time:.4f}s"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        
-        logger.info(f"[{request_id}] {request.method} {request.url.path} - {response.status_code} ({process_time:.2f}s)")
-        
-        return response
-
-class RateLimitGuard(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        # Integration point for Redis-based rate limiting
-        # Currently a pass-through until Redis connection is provided
-        return await call_next(request)
+            )(scope, receive, send_with_headers)
+
+def _client_host(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+def _payload_too_large() -> JSONResponse:
+    return JSONResponse(
+        status_code=413,
+        content={"error": f"Payload exceeds the {MAX_CONTENT_LENGTH} byte limit."}
+    )
+
+def _blocked(scope: Scope, request_id: str, rule: str) -> JSONResponse:
+    logger.warning(f"[{request_id}] Security Alert: Malicious payload blocked from {_client_host(scope)} (rule: {rule})")
+    return JSONResponse(
+        status_code=403, 
+        content={"error": "Security validation failed: Prohibited patterns detected."}
+    )
+
+def _replay(body: bytes, receive: Receive) -> Receive:
+    """Hands the already-read body to the app once, then defers to the server (disconnects)."""
+    sent = False
+
+    async def replay_receive() -> Message:
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+    return replay_receive
+
+def _rate_limited(decision) -> JSONResponse:
+    return JSONResponse(
+        status_code=429,
+        content={"error": "Rate limit exceeded. Please slow down.", "retry_after": math.ceil(decision.retry_after)},
+        headers=headers_for(decision)
+    )
+
+class RateLimitGuard:
+    """
+    Pure ASGI rate limiter that runs before the routes' auth and DB work.
+
+    Every /api request counts against a per-IP GCRA bucket (settings.RATE_LIMIT).
+    POSTs under RATE_LIMIT_PLAN_PATHS also count against a per-user bucket sized
+    by the caller's plan (PLAN_LIMITS[tier]["rate_limit"]). The user is read from
+    the JWT signature alone and the tier from the principal cache. On a miss, and
+    only for requests the IP bucket admitted, the guard loads the principal: one
+    primary-key read that the route's own auth lookup then gets from the cache,
+    so a token never vouches for its own tier. A request refused by the user
+    bucket gives its IP token back; 429s from one account must not drain the
+    budget of everyone behind the same NAT.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.ip_rate = parse_rate(settings.RATE_LIMIT)
+        self.plan_paths = tuple(p.strip() for p in settings.RATE_LIMIT_PLAN_PATHS.split(",") if p.strip())
+        self.plan_rates = {tier: parse_rate(limits["rate_limit"]) for tier, limits in PLAN_LIMITS.items()}
+
+    @staticmethod
+    async def _load_principal(user_id: str) -> Optional[UserPrincipal]:
+        async with connection.AsyncSessionLocal() as db:
+            user = (await db.execute(select(User).where(User.id == user_id))).scalar_one_or_none()
+        if user is None:
+            return None
+        principal = UserPrincipal.from_user(user)
+        PrincipalCache.put(principal)
+        return principal
+
+    async def _user_and_tier(self, scope: Scope) -> Tuple[Optional[str], str]:
+        authorization = Headers(scope=scope).get("authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            return None, UserTier.FREE
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            # Let the route reject it; the IP bucket still applies
+            return None, UserTier.FREE
+        user_id = claims.get("sub")
+        if not user_id:
+            return None, UserTier.FREE
+        principal = PrincipalCache.peek(user_id)
+        if principal is None:
+            try:
+                principal = await self._load_principal(user_id)
+            except Exception as e:
+                # Fail open like the store does, at the lowest plan's rate
+                logger.error(f"Rate limit principal lookup failed: {str(e)}")
+        return user_id, principal.tier if principal else UserTier.FREE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED or not scope["path"].startswith("/api"):
+            await self.app(scope, receive, send)
+            return
+
+        decisions = []
+        ip_key = f"ip:{_client_host(scope)}"
+        decision = await RateLimiter.hit(ip_key, self.ip_rate)
+        if decision is not None:
+            if not decision.allowed:
+                await _rate_limited(decision)(scope, receive, send)
+                return
+            decisions.append(decision)
+
+        if scope["method"] == "POST" and scope["path"].startswith(self.plan_paths):
+            user_id, tier = await self._user_and_tier(scope)
+            if user_id:
+                decision = await RateLimiter.hit(f"user:{user_id}", self.plan_rates.get(tier, self.plan_rates[UserTier.FREE]))
+                if decision is not None:
+                    if not decision.allowed:
+                        if decisions:
+                            await RateLimiter.refund(ip_key, self.ip_rate)
+                        await _rate_limited(decision)(scope, receive, send)
+                        return
+                    decisions.append(decision)
+
+        if not decisions:
+            await self.app(scope, receive, send)
+            return
+
+        # Report the tightest bucket
+        limit_headers = headers_for(min(decisions, key=lambda d: d.remaining))
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in limit_headers.items():
+                    headers[name] = value
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
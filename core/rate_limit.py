@@ -0,0 +1,207 @@
+
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Tuple
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from core.config import settings
+
+logger = logging.getLogger("brandcraft.ratelimit")
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+def parse_rate(rate: str) -> Optional[Tuple[int, float]]:
+    """'100/minute' -> (100, 60.0); 'unlimited' (or empty) -> None."""
+    if not rate or rate.strip().lower() == "unlimited":
+        return None
+    count, _, unit = rate.strip().partition("/")
+    unit = unit.strip().lower().rstrip("s")
+    return int(count), float(PERIODS[unit])
+
+class Decision:
+    __slots__ = ("allowed", "limit", "remaining", "reset_after", "retry_after")
+
+    def __init__(self, allowed: bool, limit: int, remaining: int, reset_after: float, retry_after: float):
+        self.allowed = allowed
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_after = reset_after
+        self.retry_after = retry_after
+
+def gcra(tat: Optional[float], now: float, limit: int, period: float, cost: int = 1) -> Tuple[Optional[float], Decision]:
+    """
+    Generic Cell Rate Algorithm: one timestamp per key (the theoretical arrival
+    time) instead of a counter plus refill clock. Bursts of up to `limit` are
+    allowed, refilling at limit/period; a hit spends `cost` of them at once.
+    Returns (new_tat or None if denied, decision).
+    """
+    interval = period / limit
+    tat = max(tat or now, now)
+    new_tat = tat + interval * cost
+    allow_at = new_tat - period
+    if allow_at > now:
+        return None, Decision(False, limit, 0, tat - now, allow_at - now)
+    remaining = int((period - (new_tat - now)) / interval + 1e-9)
+    return new_tat, Decision(True, limit, remaining, new_tat - now, 0.0)
+
+def gcra_refund(tat: Optional[float], now: float, limit: int, period: float, cost: int = 1) -> Optional[float]:
+    """Gives back `cost` cells taken by an earlier allowed hit; None once the bucket is full again."""
+    if tat is None:
+        return None
+    refunded = tat - period / limit * cost
+    return refunded if refunded > now else None
+
+class RateLimitStore(ABC):
+    @abstractmethod
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> Decision:
+        pass
+
+    @abstractmethod
+    async def refund(self, key: str, limit: int, period: float, cost: int = 1):
+        pass
+
+class LocalRateLimitStore(RateLimitStore):
+    """
+    Per-worker store. hit() never awaits, so on the event loop each
+    read-compute-write runs to completion without a lock.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats: Dict[str, float] = {}
+
+    def _prune(self, now: float):
+        # Keys whose TAT is in the past carry no state (a fresh bucket is identical)
+        self._tats = {k: v for k, v in self._tats.items() if v > now}
+
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> Decision:
+        now = time.monotonic()
+        new_tat, decision = gcra(self._tats.get(key), now, limit, period, cost)
+        if new_tat is not None:
+            self._tats[key] = new_tat
+            if len(self._tats) > self.max_keys:
+                self._prune(now)
+        return decision
+
+    async def refund(self, key: str, limit: int, period: float, cost: int = 1):
+        tat = gcra_refund(self._tats.get(key), time.monotonic(), limit, period, cost)
+        if tat is None:
+            self._tats.pop(key, None)
+        else:
+            self._tats[key] = tat
+
+class SQLiteRateLimitStore(RateLimitStore):
+    """
+    Local stand-in for a shared store (e.g. Redis): all workers on the host
+    share one SQLite file, and each hit is a short IMMEDIATE transaction.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _hit(self, key: str, limit: int, period: float, cost: int) -> Decision:
+        # Wall clock: monotonic clocks are not comparable across processes
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            new_tat, decision = gcra(row[0] if row else None, now, limit, period, cost)
+            if new_tat is not None:
+                conn.execute(
+                    "INSERT INTO rate_limits (key, tat) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                    (key, new_tat)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return decision
+
+    async def hit(self, key: str, limit: int, period: float, cost: int = 1) -> Decision:
+        return await asyncio.to_thread(self._hit, key, limit, period, cost)
+
+    def _refund(self, key: str, limit: int, period: float, cost: int):
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+            tat = gcra_refund(row[0] if row else None, now, limit, period, cost)
+            if tat is None:
+                conn.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+            else:
+                conn.execute("UPDATE rate_limits SET tat = ? WHERE key = ?", (tat, key))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    async def refund(self, key: str, limit: int, period: float, cost: int = 1):
+        await asyncio.to_thread(self._refund, key, limit, period, cost)
+
+class RateLimiter:
+    _store: Optional[RateLimitStore] = None
+    stats: Dict[str, int] = {"allowed": 0, "limited": 0, "store_errors": 0}
+
+    @classmethod
+    def store(cls) -> RateLimitStore:
+        if cls._store is None:
+            if settings.RATE_LIMIT_BACKEND == "sqlite":
+                cls._store = SQLiteRateLimitStore(settings.RATE_LIMIT_SQLITE_PATH)
+            else:
+                cls._store = LocalRateLimitStore()
+            logger.info(f"Rate limit store: {type(cls._store).__name__}")
+        return cls._store
+
+    @classmethod
+    async def hit(cls, key: str, rate: Optional[Tuple[int, float]], cost: int = 1) -> Optional[Decision]:
+        """None when the key is unlimited or the shared store is unavailable (fail open)."""
+        if rate is None:
+            return None
+        try:
+            decision = await cls.store().hit(key, *rate, cost)
+        except Exception as e:
+            cls.stats["store_errors"] += 1
+            logger.error(f"Rate limit store error for {key}: {e}")
+            return None
+        cls.stats["allowed" if decision.allowed else "limited"] += 1
+        return decision
+
+    @classmethod
+    async def refund(cls, key: str, rate: Optional[Tuple[int, float]], cost: int = 1):
+        """Undoes an allowed hit whose request was then rejected by another bucket."""
+        if rate is None:
+            return
+        try:
+            await cls.store().refund(key, *rate, cost)
+        except Exception as e:
+            cls.stats["store_errors"] += 1
+            logger.error(f"Rate limit refund failed for {key}: {e}")
+
+def headers_for(decision: Decision) -> Dict[str, str]:
+    headers = {
+        "RateLimit-Limit": str(decision.limit),
+        "RateLimit-Remaining": str(decision.remaining),
+        "RateLimit-Reset": str(math.ceil(decision.reset_after)),
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(math.ceil(decision.retry_after))
+    return headers
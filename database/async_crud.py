@@ -0,0 +1,37 @@
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models
+from .rollups import UsageRollups
+from .crud import build_usage_log
+from modules.credits.ledger import CreditLedger
+
+async def get_user(db: AsyncSession, user_id: str):
+    result = await db.execute(select(models.User).where(models.User.id == user_id))
+    return result.scalar_one_or_none()
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalar_one_or_none()
+
+async def update_user_credits(db: AsyncSession, user_id: str, amount: int):
+    if await CreditLedger.adjust(db, user_id, amount) is None:
+        return None
+    return await get_user(db, user_id)
+
+async def create_usage_log(
+    db: AsyncSession, 
+    user_id: str, 
+    endpoint: str, 
+    method: str, 
+    status: int, 
+    duration: float, 
+    credits: int, 
+    ip: str,
+    ai_metadata: dict = None
+):
+    log = build_usage_log(user_id, endpoint, method, status, duration, credits, ip, ai_metadata)
+    db.add(log)
+    await UsageRollups.apply(db, UsageRollups.aggregate([log]))
+    await db.commit()
+    return log
@@ -1,7 +1,10 @@
 
 from sqlalchemy.orm import Session
 from . import models
+from .rollups import UsageRollups
 from modules.auth import service as auth_service
+from modules.credits.ledger import CreditLedger
+import datetime
 import uuid
 
 def get_user(db: Session, user_id: str):
@@ -25,15 +28,11 @@ def create_user(db: Session, email: str, password: str, full_name: str):
     return db_user
 
 def update_user_credits(db: Session, user_id: str, amount: int):
-    user = get_user(db, user_id)
-    if user:
-        user.credits += amount
-        db.commit()
-        db.refresh(user)
-    return user
+    if CreditLedger.adjust_sync(db, user_id, amount) is None:
+        return None
+    return get_user(db, user_id)
 
-def create_usage_log(
-    db: Session, 
+def build_usage_log(
     user_id: str, 
     endpoint: str, 
     method: str, 
@@ -42,11 +41,11 @@ def create_usage_log(
     credits: int, 
     ip: str,
     ai_metadata: dict = None
-):
+) -> models.UsageLog:
     ai_metadata = ai_metadata or {}
     usage = ai_metadata.get("usage", {})
     
-    log = models.UsageLog(
+    return models.UsageLog(
         user_id=user_id,
         endpoint=endpoint,
         method=method,
@@ -61,8 +60,23 @@ def create_usage_log(
         prompt_tokens=usage.get("prompt_tokens", 0),
         completion_tokens=usage.get("completion_tokens", 0),
         total_tokens=usage.get("total_tokens", 0),
-        cost_estimate=ai_metadata.get("cost_estimate", 0.0)
+        cost_estimate=ai_metadata.get("cost_estimate", 0.0),
+        timestamp=datetime.datetime.utcnow()
     )
+
+def create_usage_log(
+    db: Session, 
+    user_id: str, 
+    endpoint: str, 
+    method: str, 
+    status: int, 
+    duration: float, 
+    credits: int, 
+    ip: str,
+    ai_metadata: dict = None
+):
+    log = build_usage_log(user_id, endpoint, method, status, duration, credits, ip, ai_metadata)
     db.add(log)
+    UsageRollups.apply_sync(db, UsageRollups.aggregate([log]))
     db.commit()
     return log
@@ -0,0 +1,112 @@
+
+"""
+Minimal forward-only schema migrations.
+
+`Base.metadata.create_all` creates missing tables but never alters existing
+ones (including adding indexes), so changes to tables that already exist in
+deployed databases are registered here and applied once, in order. start.sh
+runs them (`python -m database.migrations`) before gunicorn forks its workers;
+the call in main.py is then a no-op, and a file lock plus the primary key on
+`schema_migrations` keep concurrent runners from applying anything twice.
+Applied ids are recorded in `schema_migrations`.
+"""
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from contextlib import contextmanager
+from typing import Callable, List, Tuple
+import datetime
+import fcntl
+import logging
+import os
+import tempfile
+from . import models
+from .rollups import UsageRollups
+
+logger = logging.getLogger("brandcraft.migrations")
+
+LOCK_FILE = os.getenv("MIGRATIONS_LOCK_FILE", os.path.join(tempfile.gettempdir(), "brandcraft-migrations.lock"))
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations", _metadata,
+    Column("id", String, primary_key=True),
+    Column("applied_at", DateTime, default=datetime.datetime.utcnow),
+)
+
+def _create_table_indexes(table) -> Callable[[Connection], None]:
+    def migrate(conn: Connection):
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    return migrate
+
+def _add_column(table, column_name: str) -> Callable[[Connection], None]:
+    def migrate(conn: Connection):
+        if column_name in {c["name"] for c in inspect(conn).get_columns(table.name)}:
+            return  # created by create_all on a fresh database
+        column = table.c[column_name]
+        conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"))
+    return migrate
+
+def _backfill_usage_rollups(conn: Connection):
+    # The session joins the migration's transaction, so the backfill and its
+    # schema_migrations row commit together
+    UsageRollups.rebuild(Session(bind=conn))
+
+MIGRATIONS: List[Tuple[str, str, Callable[[Connection], None]]] = [
+    (
+        "0001_usage_logs_analytics_indexes",
+        "Composite/secondary indexes for usage_logs analytics queries",
+        _create_table_indexes(models.UsageLog.__table__),
+    ),
+    (
+        "0002_usage_rollups_backfill",
+        "Build usage_rollups from all usage_logs recorded before rollups existed",
+        _backfill_usage_rollups,
+    ),
+    (
+        "0003_brand_contexts_updated_at",
+        "Version stamp used to revalidate cached brand contexts across workers",
+        _add_column(models.BrandContextModel.__table__, "updated_at"),
+    ),
+]
+
+@contextmanager
+def _host_lock():
+    """Serialises runners on this host (gunicorn workers importing main.py at once)."""
+    with open(LOCK_FILE, "a") as handle:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
+
+def run_migrations(engine: Engine) -> List[str]:
+    applied_now = []
+    with _host_lock():
+        _metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            applied = set(conn.execute(select(schema_migrations.c.id)).scalars())
+        for migration_id, description, migrate in MIGRATIONS:
+            if migration_id in applied:
+                continue
+            try:
+                with engine.begin() as conn:
+                    logger.info(f"Applying migration {migration_id}: {description}")
+                    migrate(conn)
+                    conn.execute(schema_migrations.insert().values(id=migration_id, applied_at=datetime.datetime.utcnow()))
+            except IntegrityError:
+                # Another host sharing the database recorded it first; ours rolled back
+                logger.info(f"Migration {migration_id} already applied elsewhere")
+                continue
+            applied_now.append(migration_id)
+    return applied_now
+
+if __name__ == "__main__":
+    from .connection import Base, engine
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations(engine)
+    logger.info(f"Schema up to date ({len(applied)} migrations applied)")
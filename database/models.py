@@ -1,5 +1,5 @@
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Float, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Float, Enum, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from .connection import Base
 import datetime
@@ -31,6 +31,7 @@ class User(Base):
 
     contexts = relationship("BrandContextModel", back_populates="owner")
     logs = relationship("UsageLog", back_populates="user")
+    credit_transactions = relationship("CreditTransaction", back_populates="user")
 
 class BrandContextModel(Base):
     __tablename__ = "brand_contexts"
@@ -42,11 +43,21 @@ class BrandContextModel(Base):
     brand_personality = Column(String)
     keywords = Column(JSON)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # Version stamp: ContextManager revalidates cached copies against it
+    updated_at = Column(DateTime, nullable=True)
 
     owner = relationship("User", back_populates="contexts")
 
 class UsageLog(Base):
     __tablename__ = "usage_logs"
+    __table_args__ = (
+        # Hot analytics paths: per-user history, time windows, cost audits, tool breakdowns
+        Index("ix_usage_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_usage_logs_timestamp", "timestamp"),
+        Index("ix_usage_logs_provider_model_name", "provider", "model_name"),
+        Index("ix_usage_logs_endpoint", "endpoint"),
+        Index("ix_usage_logs_status_code", "status_code"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, ForeignKey("users.id"))
     endpoint = Column(String)
@@ -64,3 +75,65 @@ class UsageLog(Base):
     timestamp = Column(DateTime, default=datetime.datetime.utcnow)
 
     user = relationship("User", back_populates="logs")
+
+class CreditTransaction(Base):
+    """Append-only credit ledger. Debits are negative, refunds and grants positive."""
+    __tablename__ = "credit_transactions"
+    __table_args__ = (
+        # One debit and at most one refund per reservation
+        UniqueConstraint("reservation_id", "kind", name="uq_credit_tx_reservation_kind"),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, ForeignKey("users.id"), index=True)
+    amount = Column(Integer)
+    kind = Column(String)  # debit | refund | adjust
+    endpoint = Column(String, nullable=True)
+    reservation_id = Column(String, nullable=True)
+    balance_after = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    user = relationship("User", back_populates="credit_transactions")
+
+class UsageRollup(Base):
+    """
+    Pre-aggregated usage_logs counters per hour/day bucket and
+    (user, endpoint, provider, model). Provider/model use "" instead of NULL
+    so they participate in the unique key.
+    """
+    __tablename__ = "usage_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "granularity", "bucket_start", "user_id", "endpoint", "provider", "model_name",
+            name="uq_usage_rollup_bucket"
+        ),
+    )
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String)  # hour | day
+    bucket_start = Column(DateTime, index=True)
+    user_id = Column(String, ForeignKey("users.id"), index=True)
+    endpoint = Column(String, default="")
+    provider = Column(String, default="")
+    model_name = Column(String, default="")
+    requests = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    credits_consumed = Column(Integer, default=0)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    cost_estimate = Column(Float, default=0.0)
+    duration_sum = Column(Float, default=0.0)
+
+class JobRecord(Base):
+    """Background job state, shared by every worker so status polls can land on any of them."""
+    __tablename__ = "jobs"
+    id = Column(String, primary_key=True)
+    kind = Column(String)
+    owner_id = Column(String, ForeignKey("users.id"), index=True)
+    status = Column(String)
+    payload = Column(JSON)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    callback_url = Column(String, nullable=True)
+    created_at = Column(Float)
+    started_at = Column(Float, nullable=True)
+    finished_at = Column(Float, nullable=True, index=True)
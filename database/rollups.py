@@ -0,0 +1,151 @@
+
+from sqlalchemy import and_, case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from . import models
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import datetime
+import logging
+
+logger = logging.getLogger("brandcraft.rollups")
+
+GRANULARITIES = ("hour", "day")
+KEY_COLUMNS = ("granularity", "bucket_start", "user_id", "endpoint", "provider", "model_name")
+COUNTER_COLUMNS = (
+    "requests", "errors", "credits_consumed", "prompt_tokens",
+    "completion_tokens", "total_tokens", "cost_estimate", "duration_sum"
+)
+
+def bucket_start(ts: datetime.datetime, granularity: str) -> datetime.datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+class UsageRollups:
+    """Maintains usage_rollups incrementally from UsageLog batches."""
+
+    @staticmethod
+    def aggregate(logs: Iterable[models.UsageLog]) -> List[Dict[str, Any]]:
+        groups: Dict[Tuple, Dict[str, Any]] = {}
+        for log in logs:
+            ts = log.timestamp or datetime.datetime.utcnow()
+            for granularity in GRANULARITIES:
+                key = (
+                    granularity, bucket_start(ts, granularity), log.user_id,
+                    log.endpoint or "", log.provider or "", log.model_name or ""
+                )
+                row = groups.get(key)
+                if row is None:
+                    row = groups[key] = dict(zip(KEY_COLUMNS, key), **{c: 0 for c in COUNTER_COLUMNS})
+                row["requests"] += 1
+                row["errors"] += 1 if (log.status_code or 0) >= 400 else 0
+                row["credits_consumed"] += log.credits_consumed or 0
+                row["prompt_tokens"] += log.prompt_tokens or 0
+                row["completion_tokens"] += log.completion_tokens or 0
+                row["total_tokens"] += log.total_tokens or 0
+                row["cost_estimate"] += log.cost_estimate or 0.0
+                row["duration_sum"] += log.duration or 0.0
+        return list(groups.values())
+
+    @staticmethod
+    def _upsert_statement(dialect: str):
+        # Rows are bound as executemany parameters rather than inlined with
+        # .values(rows): the statement compiles once and stays in the cache.
+        insert_fn = {"sqlite": sqlite_insert, "postgresql": pg_insert}.get(dialect)
+        if insert_fn is None:
+            return None
+        stmt = insert_fn(models.UsageRollup)
+        return stmt.on_conflict_do_update(
+            index_elements=list(KEY_COLUMNS),
+            set_={c: getattr(models.UsageRollup, c) + stmt.excluded[c] for c in COUNTER_COLUMNS}
+        )
+
+    @staticmethod
+    def _update_statement(row: Dict[str, Any]):
+        return (
+            update(models.UsageRollup)
+            .where(and_(*(getattr(models.UsageRollup, k) == row[k] for k in KEY_COLUMNS)))
+            .values({c: getattr(models.UsageRollup, c) + row[c] for c in COUNTER_COLUMNS})
+            .execution_options(synchronize_session=False)
+        )
+
+    @classmethod
+    async def apply(cls, db: AsyncSession, rows: List[Dict[str, Any]]):
+        """Adds aggregated rows to the rollups inside the caller's transaction."""
+        if not rows:
+            return
+        stmt = cls._upsert_statement(db.bind.dialect.name)
+        if stmt is not None:
+            await db.execute(stmt, rows)
+            return
+        for row in rows:
+            if (await db.execute(cls._update_statement(row))).rowcount == 0:
+                db.add(models.UsageRollup(**row))
+
+    @classmethod
+    def apply_sync(cls, db: Session, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        stmt = cls._upsert_statement(db.bind.dialect.name)
+        if stmt is not None:
+            db.execute(stmt, rows)
+            return
+        for row in rows:
+            if db.execute(cls._update_statement(row)).rowcount == 0:
+                db.add(models.UsageRollup(**row))
+
+    @classmethod
+    def rebuild(cls, db: Session, since: Optional[datetime.datetime] = None, chunk_size: int = 1000) -> int:
+        """
+        Compactor/backfill: recomputes rollups for buckets at or after `since`
+        (all history when None) straight from usage_logs.
+        """
+        since = bucket_start(since, "day") if since else None
+        stale = delete(models.UsageRollup)
+        db.execute(stale.where(models.UsageRollup.bucket_start >= since) if since else stale)
+
+        dialect = db.bind.dialect.name
+        log = models.UsageLog
+        if dialect == "postgresql":
+            hour_expr = func.date_trunc("hour", log.timestamp)
+        else:
+            hour_expr = func.strftime("%Y-%m-%d %H:00:00", log.timestamp)
+
+        query = select(
+            hour_expr.label("hour"), log.user_id, log.endpoint, log.provider, log.model_name,
+            func.count(log.id), func.sum(case((log.status_code >= 400, 1), else_=0)),
+            func.sum(log.credits_consumed), func.sum(log.prompt_tokens), func.sum(log.completion_tokens),
+            func.sum(log.total_tokens), func.sum(log.cost_estimate), func.sum(log.duration)
+        ).group_by(
+            hour_expr, log.user_id, log.endpoint, log.provider, log.model_name
+        )
+        if since:
+            query = query.where(log.timestamp >= since)
+
+        days: Dict[Tuple, Dict[str, Any]] = {}
+        hours: List[Dict[str, Any]] = []
+        total = 0
+        for hour, user_id, endpoint, provider, model_name, *counters in db.execute(query):
+            if isinstance(hour, str):
+                hour = datetime.datetime.strptime(hour, "%Y-%m-%d %H:%M:%S")
+            values = {c: (v or 0) for c, v in zip(COUNTER_COLUMNS, counters)}
+            dims = {"user_id": user_id, "endpoint": endpoint or "", "provider": provider or "", "model_name": model_name or ""}
+            hours.append({"granularity": "hour", "bucket_start": hour, **dims, **values})
+            day_key = (bucket_start(hour, "day"),) + tuple(dims.values())
+            day = days.setdefault(day_key, {"granularity": "day", "bucket_start": day_key[0], **dims, **{c: 0 for c in COUNTER_COLUMNS}})
+            for c in COUNTER_COLUMNS:
+                day[c] += values[c]
+            total += values["requests"]
+            if len(hours) >= chunk_size:
+                cls.apply_sync(db, hours)
+                hours = []
+
+        cls.apply_sync(db, hours)
+        day_rows = list(days.values())
+        for i in range(0, len(day_rows), chunk_size):
+            cls.apply_sync(db, day_rows[i:i + chunk_size])
+        db.commit()
+        logger.info(f"Rebuilt usage rollups since {since.isoformat() if since else 'the first log'} from {total} log rows")
+        return total
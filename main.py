@@ -9,7 +9,16 @@ from core.exceptions import setup_exception_handlers
 from core.config import settings
 from core.middleware import ProductionSecurityMiddleware, RateLimitGuard
 from core.logger import setup_logging
-from database.connection import Base, engine
+from database.connection import Base, engine, async_engine
+from database.migrations import run_migrations
+from services.providers.http_session import HTTPSessionPool
+from services.providers.executor import ProviderExecutor
+from services.job_queue import JobQueue
+from services.ai_router import AIRouter
+from services.usage_writer import UsageLogWriter
+from services.image_storage import ImageStorage
+from modules.auth.hashing import PasswordHasher
+from core.security import SecurityEngine
 
 # Init DB
 Base.metadata.create_all(bind=engine)
@@ -17,6 +26,9 @@ Base.metadata.create_all(bind=engine)
 # Setup Logs
 logger = setup_logging()
 
+# Schema changes to existing tables (already applied by start.sh under gunicorn)
+run_migrations(engine)
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="Investor-Ready SaaS Brand Identity Platform",
@@ -50,6 +62,25 @@ app.include_router(analytics.router, prefix=settings.API_V1_STR + "/analytics",
 app.include_router(context.router, prefix=settings.API_V1_STR + "/context", tags=["Context"])
 app.include_router(branding.router, prefix=settings.API_V1_STR + "/branding", tags=["Branding"])
 
+@app.on_event("startup")
+async def startup():
+    SecurityEngine.reload()
+    await HTTPSessionPool.startup()
+    await UsageLogWriter.start()
+    await JobQueue.startup()
+    await ImageStorage.start()
+    await AIRouter.warmup()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await JobQueue.shutdown()
+    await ImageStorage.stop()
+    await UsageLogWriter.stop()
+    await HTTPSessionPool.shutdown()
+    ProviderExecutor.shutdown_all()
+    PasswordHasher.shutdown()
+    await async_engine.dispose()
+
 @app.get("/health")
 def health():
     return {"status":"ok"}
@@ -0,0 +1,137 @@
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from passlib.context import CryptContext
+from fastapi import HTTPException
+from core.config import settings
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger("brandcraft.auth")
+
+def build_context(rounds: int) -> CryptContext:
+    # min_rounds makes verify_and_update() hand back a rehash for hashes below the configured cost
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds, bcrypt__min_rounds=rounds)
+
+_contexts: Dict[int, CryptContext] = {}
+
+def _context(rounds: int) -> CryptContext:
+    # Module-level so process-pool workers build their own copy on first use
+    ctx = _contexts.get(rounds)
+    if ctx is None:
+        ctx = _contexts[rounds] = build_context(rounds)
+    return ctx
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+def _verify(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed)
+
+def _timed(fn: Callable[..., Any], *args) -> Tuple[Any, float, float]:
+    # Wall-clock stamps so queue wait can be measured across process boundaries too
+    started = time.time()
+    return fn(*args), started, time.time()
+
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a dedicated pool (threads by default, or
+    processes via PASSWORD_HASH_POOL=process). At most PASSWORD_HASH_MAX_PENDING
+    operations may be queued or running; beyond that callers get a 503 instead
+    of piling up behind a login storm.
+    """
+    _pool: Optional[Executor] = None
+    _lock = threading.Lock()
+    stats: Dict[str, float] = {"in_flight": 0, "completed": 0, "rejected": 0, "queue_wait_total": 0.0, "run_time_total": 0.0}
+
+    @classmethod
+    def _executor(cls) -> Executor:
+        with cls._lock:
+            if cls._pool is None:
+                workers = settings.PASSWORD_HASH_WORKERS
+                if settings.PASSWORD_HASH_POOL == "process":
+                    cls._pool = ProcessPoolExecutor(max_workers=workers)
+                else:
+                    cls._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+                logger.info(f"Password hashing pool ready ({settings.PASSWORD_HASH_POOL}, {workers} workers, cost {settings.BCRYPT_ROUNDS})")
+            return cls._pool
+
+    @classmethod
+    async def _run(cls, fn: Callable[..., Any], *args) -> Any:
+        pool = cls._executor()
+        if cls.stats["in_flight"] >= settings.PASSWORD_HASH_MAX_PENDING:
+            cls.stats["rejected"] += 1
+            raise HTTPException(status_code=503, detail="Authentication is busy, please retry shortly", headers={"Retry-After": "1"})
+        cls.stats["in_flight"] += 1
+        submitted = time.time()
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(pool, _timed, fn, *args)
+        finally:
+            cls.stats["in_flight"] -= 1
+        cls.stats["completed"] += 1
+        cls.stats["queue_wait_total"] += max(0.0, started - submitted)
+        cls.stats["run_time_total"] += finished - started
+        return result
+
+    @classmethod
+    async def hash(cls, password: str) -> str:
+        return await cls._run(_hash, password, settings.BCRYPT_ROUNDS)
+
+    @classmethod
+    async def verify(cls, password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """Returns (valid, replacement_hash); the replacement is set when the stored cost is too low."""
+        if not hashed:
+            return False, None
+        return await cls._run(_verify, password, hashed, settings.BCRYPT_ROUNDS)
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, float]:
+        completed = cls.stats["completed"]
+        return {
+            "in_flight": cls.stats["in_flight"],
+            "completed": completed,
+            "rejected": cls.stats["rejected"],
+            "avg_queue_wait_ms": round(cls.stats["queue_wait_total"] / completed * 1000, 2) if completed else 0.0,
+            "avg_hash_ms": round(cls.stats["run_time_total"] / completed * 1000, 2) if completed else 0.0,
+        }
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._pool is not None:
+                cls._pool.shutdown(wait=False, cancel_futures=True)
+                cls._pool = None
+
+    @staticmethod
+    def benchmark(target_ms: float = 250.0, min_rounds: int = 8, max_rounds: int = 15, samples: int = 3) -> Dict[str, Any]:
+        """
+        Times bcrypt on this host for each cost factor and picks the highest cost
+        whose median hash time stays within target_ms.
+        """
+        timings = {}
+        recommended = min_rounds
+        for rounds in range(min_rounds, max_rounds + 1):
+            ctx = build_context(rounds)
+            runs = []
+            for _ in range(samples):
+                started = time.perf_counter()
+                ctx.hash("benchmark-password")
+                runs.append((time.perf_counter() - started) * 1000)
+            median = sorted(runs)[len(runs) // 2]
+            timings[rounds] = round(median, 1)
+            if median > target_ms:
+                break
+            recommended = rounds
+        return {"target_ms": target_ms, "timings_ms": timings, "recommended_rounds": recommended}
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Pick a bcrypt cost factor for this host.")
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    args = parser.parse_args()
+    result = PasswordHasher.benchmark(args.target_ms)
+    for rounds, ms in result["timings_ms"].items():
+        print(f"  cost {rounds:>2}: {ms:8.1f} ms/hash")
+    print(f"BCRYPT_ROUNDS={result['recommended_rounds']}  (target {result['target_ms']} ms, current {settings.BCRYPT_ROUNDS})")
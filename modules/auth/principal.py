@@ -0,0 +1,99 @@
+
+from collections import OrderedDict
+from typing import Dict, Optional
+import threading
+import time
+from core.config import settings
+from database.models import User
+
+class UserPrincipal:
+    """Detached snapshot of the fields the request path needs from a User row."""
+
+    __slots__ = ("id", "email", "tier", "is_admin", "is_active", "credits")
+
+    def __init__(self, id: str, email: str, tier: str, is_admin: bool, is_active: bool, credits: int):
+        self.id = id
+        self.email = email
+        self.tier = tier
+        self.is_admin = bool(is_admin)
+        self.is_active = is_active is not False
+        self.credits = credits or 0
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(user.id, user.email, user.tier, user.is_admin, user.is_active, user.credits)
+
+    def copy(self) -> "UserPrincipal":
+        return UserPrincipal(self.id, self.email, self.tier, self.is_admin, self.is_active, self.credits)
+
+class PrincipalCache:
+    """
+    Per-worker LRU/TTL cache of resolved principals keyed by user id.
+    `credits` is a last-known balance kept current by the ledger's write-through;
+    the conditional UPDATE in the ledger stays the source of truth for spending.
+    """
+
+    _data: "OrderedDict[str, tuple]" = OrderedDict()
+    _lock = threading.Lock()
+    _stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @classmethod
+    def get(cls, user_id: str) -> Optional[UserPrincipal]:
+        if settings.AUTH_PRINCIPAL_CACHE_TTL <= 0:
+            return None
+        with cls._lock:
+            entry = cls._data.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del cls._data[user_id]
+                cls._stats["misses"] += 1
+                return None
+            cls._data.move_to_end(user_id)
+            cls._stats["hits"] += 1
+            # Hand out a copy so per-request mutation never leaks into the cache
+            return entry[1].copy()
+
+    @classmethod
+    def peek(cls, user_id: str) -> Optional[UserPrincipal]:
+        """Non-counting, non-promoting lookup for hot paths that can tolerate a miss."""
+        entry = cls._data.get(user_id)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    @classmethod
+    def put(cls, principal: UserPrincipal):
+        if settings.AUTH_PRINCIPAL_CACHE_TTL <= 0:
+            return
+        with cls._lock:
+            cls._data[principal.id] = (time.monotonic() + settings.AUTH_PRINCIPAL_CACHE_TTL, principal.copy())
+            cls._data.move_to_end(principal.id)
+            while len(cls._data) > settings.AUTH_PRINCIPAL_CACHE_MAX_ENTRIES:
+                cls._data.popitem(last=False)
+                cls._stats["evictions"] += 1
+
+    @classmethod
+    def update_credits(cls, user_id: str, balance: Optional[int]):
+        """Write-through from the ledger; the cached entry keeps its original expiry."""
+        if balance is None:
+            return cls.invalidate(user_id)
+        with cls._lock:
+            entry = cls._data.get(user_id)
+            if entry is not None:
+                entry[1].credits = balance
+
+    @classmethod
+    def invalidate(cls, user_id: str):
+        with cls._lock:
+            if cls._data.pop(user_id, None) is not None:
+                cls._stats["invalidations"] += 1
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._data.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {**cls._stats, "size": len(cls._data)}
@@ -3,17 +3,22 @@ import os
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import models, connection
+from modules.auth.principal import UserPrincipal, PrincipalCache
+from modules.auth.hashing import PasswordHasher, build_context
+from modules.plans.service import PlanService
+from core.config import settings
 
 SECRET_KEY = os.getenv("JWT_SECRET", "BRANDCRAFT_ULTRA_SECRET_2025")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 # 1 day
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_context(settings.BCRYPT_ROUNDS)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 def verify_password(plain_password, hashed_password):
@@ -22,31 +27,75 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def verify_password_async(plain_password, hashed_password):
+    """Off-loop verify; returns (valid, replacement_hash)."""
+    return await PasswordHasher.verify(plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await PasswordHasher.hash(password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=15))
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(connection.get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def decode_user_id(token: str) -> str:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id: str = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    return user_id
+
+def _active(principal: UserPrincipal) -> UserPrincipal:
+    if not principal.is_active:
+        raise HTTPException(status_code=403, detail="Account is disabled")
+    # AI calls made for this request are scheduled at the caller's plan tier
+    PlanService.bind_tier(principal.tier)
+    return principal
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(connection.get_db)) -> UserPrincipal:
+    user_id = decode_user_id(token)
+    principal = PrincipalCache.get(user_id)
+    if principal is None:
+        user = db.query(models.User).filter(models.User.id == user_id).first()
+        if user is None:
+            raise _credentials_exception()
+        principal = UserPrincipal.from_user(user)
+        PrincipalCache.put(principal)
+    return _active(principal)
+
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(connection.get_async_db)) -> UserPrincipal:
+    user_id = decode_user_id(token)
+    principal = PrincipalCache.get(user_id)
+    if principal is None:
+        result = await db.execute(select(models.User).where(models.User.id == user_id))
+        user = result.scalar_one_or_none()
+        if user is None:
+            raise _credentials_exception()
+        principal = UserPrincipal.from_user(user)
+        PrincipalCache.put(principal)
+    return _active(principal)
+
+async def get_admin_user(token: str = Depends(oauth2_scheme), db: Session = Depends(connection.get_db)) -> UserPrincipal:
+    # Always read from the database: PrincipalCache is per worker, so a revoked
+    # admin would otherwise keep access on other workers until their entries expire
+    user_id = decode_user_id(token)
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if user is None:
-        raise credentials_exception
-    return user
-
-async def get_admin_user(current_user: models.User = Depends(get_current_user)):
-    if not current_user.is_admin:
+        raise _credentials_exception()
+    principal = UserPrincipal.from_user(user)
+    PrincipalCache.put(principal)
+    if not _active(principal).is_admin:
         raise HTTPException(status_code=403, detail="Admin privileges required")
-    return current_user
+    return principal
@@ -0,0 +1,148 @@
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from fastapi import HTTPException
+from database.models import User, CreditTransaction
+from modules.plans.tiers import CREDIT_COSTS
+from modules.auth.principal import UserPrincipal, PrincipalCache
+from typing import Optional, Union
+import uuid
+
+DEBIT = "debit"
+REFUND = "refund"
+ADJUST = "adjust"
+
+def _debit_statement(user_id: str, cost: int):
+    # Single conditional UPDATE: no read-modify-write, no lost updates across workers
+    return (
+        update(User)
+        .where(User.id == user_id, User.credits >= cost)
+        .values(credits=User.credits - cost)
+        .returning(User.credits)
+        .execution_options(synchronize_session=False)
+    )
+
+def _credit_statement(user_id: str, amount: int):
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(credits=User.credits + amount)
+        .returning(User.credits)
+        .execution_options(synchronize_session=False)
+    )
+
+def _remember_balance(user: Union[User, UserPrincipal], balance: Optional[int]):
+    if balance is None:
+        return
+    if isinstance(user, User):
+        set_committed_value(user, "credits", balance)
+    else:
+        user.credits = balance
+    PrincipalCache.update_credits(user.id, balance)
+
+class Reservation:
+    """Credits held for one AI call. Either commit() it on success or refund() it on failure."""
+
+    def __init__(self, reservation_id: str, user_id: str, endpoint: str, amount: int):
+        self.id = reservation_id
+        self.user_id = user_id
+        self.endpoint = endpoint
+        self.amount = amount
+        self.settled = False
+
+    def commit(self):
+        # The debit row is already durable; committing just forbids a later refund
+        self.settled = True
+
+    async def refund(self, db: AsyncSession, amount: Optional[int] = None) -> bool:
+        """Refunds the whole hold, or only `amount` of it (e.g. the failed parts of a composite call)."""
+        if self.settled:
+            return False
+        self.settled = True
+        return await CreditLedger.refund(db, self.user_id, self.amount if amount is None else amount, self.id, self.endpoint)
+
+class CreditLedger:
+    @staticmethod
+    def cost_for(endpoint: str, units: int = 1) -> int:
+        return CREDIT_COSTS.get(endpoint, 1) * units
+
+    @classmethod
+    async def reserve(cls, db: AsyncSession, user: Union[User, UserPrincipal], endpoint: str, units: int = 1, amount: Optional[int] = None) -> Reservation:
+        cost = cls.cost_for(endpoint, units) if amount is None else amount
+        reservation_id = uuid.uuid4().hex
+        balance = (await db.execute(_debit_statement(user.id, cost))).scalar_one_or_none()
+        if balance is None:
+            await db.rollback()
+            _remember_balance(user, (await db.execute(select(User.credits).where(User.id == user.id))).scalar_one_or_none())
+            raise HTTPException(
+                status_code=402, 
+                detail=f"Insufficient credits. Required: {cost}, Available: {user.credits}"
+            )
+        db.add(CreditTransaction(
+            user_id=user.id, amount=-cost, kind=DEBIT, endpoint=endpoint,
+            reservation_id=reservation_id, balance_after=balance
+        ))
+        await db.commit()
+        _remember_balance(user, balance)
+        return Reservation(reservation_id, user.id, endpoint, cost)
+
+    @staticmethod
+    async def refund(db: AsyncSession, user_id: str, amount: int, reservation_id: str, endpoint: Optional[str] = None) -> bool:
+        """Idempotent: the unique (reservation_id, kind) constraint rejects a second refund."""
+        tx = CreditTransaction(
+            user_id=user_id, amount=amount, kind=REFUND, endpoint=endpoint, reservation_id=reservation_id
+        )
+        db.add(tx)
+        try:
+            await db.flush()
+        except IntegrityError:
+            await db.rollback()
+            return False
+        tx.balance_after = (await db.execute(_credit_statement(user_id, amount))).scalar_one_or_none()
+        await db.commit()
+        PrincipalCache.update_credits(user_id, tx.balance_after)
+        return True
+
+    @staticmethod
+    def debit_sync(db: Session, user: Union[User, UserPrincipal], endpoint: str, units: int = 1) -> int:
+        cost = CreditLedger.cost_for(endpoint, units)
+        balance = db.execute(_debit_statement(user.id, cost)).scalar_one_or_none()
+        if balance is None:
+            db.rollback()
+            _remember_balance(user, db.execute(select(User.credits).where(User.id == user.id)).scalar_one_or_none())
+            raise HTTPException(
+                status_code=402, 
+                detail=f"Insufficient credits. Required: {cost}, Available: {user.credits}"
+            )
+        db.add(CreditTransaction(
+            user_id=user.id, amount=-cost, kind=DEBIT, endpoint=endpoint,
+            reservation_id=uuid.uuid4().hex, balance_after=balance
+        ))
+        db.commit()
+        _remember_balance(user, balance)
+        return cost
+
+    @staticmethod
+    def adjust_sync(db: Session, user_id: str, amount: int, kind: str = ADJUST) -> Optional[int]:
+        balance = db.execute(_credit_statement(user_id, amount)).scalar_one_or_none()
+        if balance is None:
+            db.rollback()
+            return None
+        db.add(CreditTransaction(user_id=user_id, amount=amount, kind=kind, balance_after=balance))
+        db.commit()
+        PrincipalCache.update_credits(user_id, balance)
+        return balance
+
+    @staticmethod
+    async def adjust(db: AsyncSession, user_id: str, amount: int, kind: str = ADJUST) -> Optional[int]:
+        balance = (await db.execute(_credit_statement(user_id, amount))).scalar_one_or_none()
+        if balance is None:
+            await db.rollback()
+            return None
+        db.add(CreditTransaction(user_id=user_id, amount=amount, kind=kind, balance_after=balance))
+        await db.commit()
+        PrincipalCache.update_credits(user_id, balance)
+        return balance
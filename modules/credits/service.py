@@ -1,19 +1,20 @@
 
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import User
-from fastapi import HTTPException
-from modules.plans.tiers import CREDIT_COSTS
+from modules.auth.principal import UserPrincipal
+from modules.credits.ledger import CreditLedger, Reservation
+from typing import Optional, Union
 
 class CreditManager:
     @staticmethod
-    def check_and_deduct(db: Session, user: User, endpoint: str):
-        cost = CREDIT_COSTS.get(endpoint, 1)
-        if user.credits < cost:
-            raise HTTPException(
-                status_code=402, 
-                detail=f"Insufficient credits. Required: {cost}, Available: {user.credits}"
-            )
-        
-        user.credits -= cost
-        db.commit()
-        return cost
+    def check_and_deduct(db: Session, user: Union[User, UserPrincipal], endpoint: str, units: int = 1):
+        return CreditLedger.debit_sync(db, user, endpoint, units)
+
+    @staticmethod
+    async def check_and_deduct_async(db: AsyncSession, user: Union[User, UserPrincipal], endpoint: str, units: int = 1):
+        return (await CreditLedger.reserve(db, user, endpoint, units)).amount
+
+    @staticmethod
+    async def reserve(db: AsyncSession, user: Union[User, UserPrincipal], endpoint: str, units: int = 1, amount: Optional[int] = None) -> Reservation:
+        return await CreditLedger.reserve(db, user, endpoint, units, amount)
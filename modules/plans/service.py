@@ -1,7 +1,11 @@
 
+from contextvars import ContextVar
 from database.models import User, UserTier
 from .tiers import PLAN_LIMITS
 
+# Tier of the user the current request (or job) runs for; read by the AI call scheduler
+_current_tier: ContextVar[str] = ContextVar("brandcraft_current_tier", default=UserTier.FREE.value)
+
 class PlanService:
     @staticmethod
     def get_user_limits(user: User):
@@ -12,3 +16,21 @@ class PlanService:
     def can_access_priority_speed(user: User) -> bool:
         limits = PlanService.get_user_limits(user)
         return limits.get("priority", False)
+
+    @staticmethod
+    def bind_tier(tier: str):
+        _current_tier.set(getattr(tier, "value", tier) or UserTier.FREE.value)
+
+    @staticmethod
+    def current_tier() -> str:
+        return _current_tier.get()
+
+    @staticmethod
+    def scheduling_rank(tier: str) -> tuple:
+        """Sort key for strict priority: priority plans first, then by weight."""
+        limits = PLAN_LIMITS.get(tier, PLAN_LIMITS[UserTier.FREE])
+        return (not limits.get("priority", False), -limits.get("scheduling_weight", 1))
+
+    @staticmethod
+    def scheduling_weight(tier: str) -> int:
+        return PLAN_LIMITS.get(tier, PLAN_LIMITS[UserTier.FREE]).get("scheduling_weight", 1)
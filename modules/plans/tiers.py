@@ -5,22 +5,26 @@ PLAN_LIMITS = {
     UserTier.FREE: {
         "monthly_credits": 10,
         "rate_limit": "20/hour",
-        "priority": False
+        "priority": False,
+        "scheduling_weight": 1
     },
     UserTier.STARTER: {
         "monthly_credits": 100,
         "rate_limit": "100/hour",
-        "priority": False
+        "priority": False,
+        "scheduling_weight": 2
     },
     UserTier.PRO: {
         "monthly_credits": 1000,
         "rate_limit": "1000/hour",
-        "priority": True
+        "priority": True,
+        "scheduling_weight": 4
     },
     UserTier.ENTERPRISE: {
         "monthly_credits": 100000,
         "rate_limit": "unlimited",
-        "priority": True
+        "priority": True,
+        "scheduling_weight": 8
     }
 }
 
@@ -0,0 +1,174 @@
+
+"""
+Analytics query benchmark.
+
+Seeds a synthetic usage_logs dataset and reports the query plan and timing of
+every analytics query (raw usage_logs scans and their usage_rollups
+counterparts), before and after the schema migrations add indexes.
+
+    python query_benchmark.py                      # 1M rows in a scratch SQLite file
+    python query_benchmark.py --rows 200000
+    python query_benchmark.py --url postgresql://... --keep
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("CI", "1")
+
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.orm import Session
+from database.connection import Base
+from database import models
+from database.migrations import run_migrations
+from database.rollups import UsageRollups
+
+ENDPOINTS = [
+    "/branding/generate-name", "/branding/generate-content", "/branding/generate-logo",
+    "/branding/sentiment", "/branding/roadmap", "/branding/research"
+]
+PROVIDERS = [("google", "gemini-3-flash-preview"), ("openai", "gpt-4o-mini"), ("stability", "sdxl"), (None, None)]
+
+def seed(engine, rows: int, users: int, days: int):
+    now = datetime.datetime.utcnow()
+    user_ids = [f"bench-user-{i}" for i in range(users)]
+    with engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"id": uid, "email": f"{uid}@bench.local", "full_name": uid, "credits": 1000, "tier": "free",
+             "is_active": True, "is_admin": False}
+            for uid in user_ids
+        ])
+    rng = random.Random(42)
+    batch = []
+    started = time.perf_counter()
+    for i in range(rows):
+        provider, model = rng.choice(PROVIDERS)
+        prompt_tokens, completion_tokens = rng.randint(20, 400), rng.randint(20, 800)
+        batch.append({
+            "user_id": rng.choice(user_ids),
+            "endpoint": rng.choice(ENDPOINTS),
+            "method": "POST",
+            "status_code": 200 if rng.random() > 0.03 else 503,
+            "duration": rng.uniform(0.2, 8.0),
+            "credits_consumed": rng.choice((1, 2, 5)),
+            "provider": provider,
+            "model_name": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost_estimate": rng.uniform(0, 0.01),
+            "ip_address": "127.0.0.1",
+            "timestamp": now - datetime.timedelta(seconds=rng.randint(0, days * 86400)),
+        })
+        if len(batch) == 20000:
+            with engine.begin() as conn:
+                conn.execute(models.UsageLog.__table__.insert(), batch)
+            batch = []
+    if batch:
+        with engine.begin() as conn:
+            conn.execute(models.UsageLog.__table__.insert(), batch)
+    print(f"Seeded {rows:,} usage_logs rows for {users} users in {time.perf_counter() - started:.1f}s")
+    return user_ids
+
+def queries(user_id: str):
+    log, rollup = models.UsageLog, models.UsageRollup
+    now = datetime.datetime.utcnow()
+    thirty, seven, one = (now - datetime.timedelta(days=d) for d in (30, 7, 1))
+    return [
+        ("admin/usage daily_stats (logs)", select(
+            func.date(log.timestamp), func.count(log.id), func.sum(log.total_tokens), func.avg(log.duration)
+        ).where(log.timestamp >= thirty).group_by(func.date(log.timestamp))),
+        ("admin/usage totals (logs)", select(func.count(log.id), func.sum(log.total_tokens))),
+        ("admin/costs breakdown (logs)", select(
+            log.provider, log.model_name, func.count(log.id), func.sum(log.cost_estimate)
+        ).group_by(log.provider, log.model_name)),
+        ("analytics/me summary (logs)", select(
+            func.count(log.id), func.sum(log.credits_consumed), func.sum(log.total_tokens)
+        ).where(log.user_id == user_id)),
+        ("analytics/me 7-day trend (logs)", select(func.date(log.timestamp), func.count(log.id)).where(
+            log.user_id == user_id, log.timestamp >= seven
+        ).group_by(func.date(log.timestamp))),
+        ("analytics/me tools (logs)", select(log.endpoint, func.count(log.id)).where(
+            log.user_id == user_id
+        ).group_by(log.endpoint)),
+        ("metrics active_24h (logs)", select(func.count(func.distinct(log.user_id))).where(log.timestamp >= one)),
+        ("metrics errors (logs)", select(func.count(log.id)).where(log.status_code >= 400)),
+        ("admin/usage daily_stats (rollups)", select(
+            rollup.bucket_start, func.sum(rollup.requests), func.sum(rollup.total_tokens)
+        ).where(rollup.granularity == "day", rollup.bucket_start >= thirty).group_by(rollup.bucket_start)),
+        ("admin/costs breakdown (rollups)", select(
+            rollup.provider, rollup.model_name, func.sum(rollup.requests), func.sum(rollup.cost_estimate)
+        ).where(rollup.granularity == "day").group_by(rollup.provider, rollup.model_name)),
+        ("analytics/me summary (rollups)", select(
+            func.sum(rollup.requests), func.sum(rollup.credits_consumed), func.sum(rollup.total_tokens)
+        ).where(rollup.user_id == user_id, rollup.granularity == "day")),
+        ("metrics active_24h (rollups)", select(func.count(func.distinct(rollup.user_id))).where(
+            rollup.granularity == "hour", rollup.bucket_start >= one
+        )),
+    ]
+
+def explain(conn, stmt) -> str:
+    compiled = stmt.compile(conn, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    rows = conn.execute(text(prefix + str(compiled))).fetchall()
+    return "\n".join("      " + " | ".join(str(c) for c in row) for row in rows)
+
+def run(engine, label: str, user_id: str, repeat: int):
+    print(f"\n=== {label} ===")
+    with engine.connect() as conn:
+        for name, stmt in queries(user_id):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                conn.execute(stmt).fetchall()
+                timings.append(time.perf_counter() - started)
+            print(f"  {name:<40} best {min(timings) * 1000:9.2f} ms  (of {repeat})")
+            print(explain(conn, stmt))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="sqlite:///./bench_usage.db")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--keep", action="store_true", help="keep the SQLite benchmark file")
+    args = parser.parse_args()
+
+    if args.url.startswith("sqlite:///"):
+        path = args.url[len("sqlite:///"):]
+        if os.path.exists(path):
+            os.remove(path)
+
+    engine = create_engine(args.url)
+    # Start from the pre-migration schema: tables without the analytics indexes
+    Base.metadata.create_all(bind=engine)
+    for index in list(models.UsageLog.__table__.indexes):
+        if index.name and index.name.startswith("ix_usage_logs_") and index.name != "ix_usage_logs_id":
+            index.drop(engine, checkfirst=True)
+
+    user_ids = seed(engine, args.rows, args.users, args.days)
+    with Session(engine) as db:
+        started = time.perf_counter()
+        UsageRollups.rebuild(db, datetime.datetime.utcnow() - datetime.timedelta(days=args.days + 1))
+        print(f"Built usage_rollups in {time.perf_counter() - started:.1f}s")
+
+    run(engine, "before migrations (no analytics indexes)", user_ids[0], args.repeat)
+    started = time.perf_counter()
+    applied = run_migrations(engine)
+    print(f"\nApplied {applied} in {time.perf_counter() - started:.1f}s")
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    run(engine, "after migrations", user_ids[0], args.repeat)
+
+    if args.url.startswith("sqlite:///") and not args.keep:
+        engine.dispose()
+        os.remove(args.url[len("sqlite:///"):])
+
+if __name__ == "__main__":
+    sys.exit(main())
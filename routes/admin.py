@@ -4,13 +4,20 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from database import connection, models
 from modules.auth.service import get_admin_user
+from modules.auth.principal import UserPrincipal, PrincipalCache
+from modules.credits.ledger import CreditLedger
 from services.metrics_engine import MetricsEngine
+from database.rollups import UsageRollups
+from core.security import SecurityEngine
+from services.image_storage import ImageStorage
+from typing import Optional
+import asyncio
 import datetime
 
 router = APIRouter()
 
 @router.get("/users")
-async def list_users(admin: models.User = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
+async def list_users(admin: UserPrincipal = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
     users = db.query(models.User).all()
     return [{
         "id": u.id, 
@@ -24,46 +31,100 @@ async def list_users(admin: models.User = Depends(get_admin_user), db: Session =
     } for u in users]
 
 @router.get("/usage")
-async def system_usage(admin: models.User = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
+async def system_usage(admin: UserPrincipal = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
     """Comprehensive system-wide usage statistics."""
     # Last 30 days daily requests
     thirty_days_ago = datetime.datetime.utcnow() - datetime.timedelta(days=30)
+    rollup = models.UsageRollup
     
     daily_stats = db.query(
-        func.date(models.UsageLog.timestamp).label('date'),
-        func.count(models.UsageLog.id).label('requests'),
-        func.sum(models.UsageLog.total_tokens).label('tokens'),
-        func.avg(models.UsageLog.duration).label('latency')
-    ).filter(models.UsageLog.timestamp >= thirty_days_ago)\
-     .group_by(func.date(models.UsageLog.timestamp))\
-     .order_by('date').all()
+        rollup.bucket_start.label('date'),
+        func.sum(rollup.requests).label('requests'),
+        func.sum(rollup.total_tokens).label('tokens'),
+        (func.sum(rollup.duration_sum) / func.sum(rollup.requests)).label('latency')
+    ).filter(rollup.granularity == "day", rollup.bucket_start >= thirty_days_ago.replace(hour=0, minute=0, second=0, microsecond=0))\
+     .group_by(rollup.bucket_start)\
+     .order_by(rollup.bucket_start).all()
+
+    totals = db.query(
+        func.sum(rollup.requests), func.sum(rollup.total_tokens)
+    ).filter(rollup.granularity == "day").one()
 
     return {
-        "daily_stats": [dict(row._asdict()) for row in daily_stats],
-        "total_requests": db.query(models.UsageLog).count(),
-        "total_tokens_all_time": db.query(func.sum(models.UsageLog.total_tokens)).scalar() or 0
+        "daily_stats": [
+            {"date": str(row.date.date()), "requests": row.requests, "tokens": row.tokens, "latency": row.latency}
+            for row in daily_stats
+        ],
+        "total_requests": totals[0] or 0,
+        "total_tokens_all_time": totals[1] or 0
     }
 
 @router.get("/costs")
-async def audit_costs(admin: models.User = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
+async def audit_costs(admin: UserPrincipal = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
     """AI Provider cost auditing."""
+    rollup = models.UsageRollup
     provider_stats = db.query(
-        models.UsageLog.provider,
-        models.UsageLog.model_name,
-        func.count(models.UsageLog.id).label('call_count'),
-        func.sum(models.UsageLog.cost_estimate).label('total_cost_usd')
-    ).group_by(models.UsageLog.provider, models.UsageLog.model_name).all()
+        rollup.provider,
+        rollup.model_name,
+        func.sum(rollup.requests).label('call_count'),
+        func.sum(rollup.cost_estimate).label('total_cost_usd')
+    ).filter(rollup.granularity == "day").group_by(rollup.provider, rollup.model_name).all()
 
     return {
-        "provider_breakdown": [dict(row._asdict()) for row in provider_stats],
-        "estimated_total_burn_usd": db.query(func.sum(models.UsageLog.cost_estimate)).scalar() or 0.0
+        "provider_breakdown": [
+            {"provider": row.provider or None, "model_name": row.model_name or None, "call_count": row.call_count, "total_cost_usd": row.total_cost_usd}
+            for row in provider_stats
+        ],
+        "estimated_total_burn_usd": sum(row.total_cost_usd or 0.0 for row in provider_stats)
     }
 
+@router.post("/rollups/rebuild")
+async def rebuild_rollups(days: Optional[int] = 30, admin: UserPrincipal = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
+    """Recompute usage rollups from raw usage_logs (backfill or repair); days=0 rebuilds all history."""
+    since = datetime.datetime.utcnow() - datetime.timedelta(days=days) if days else None
+    # A full rebuild scans usage_logs; keep it off the event loop
+    rows = await asyncio.to_thread(UsageRollups.rebuild, db, since)
+    return {"status": "rebuilt", "since": since.date().isoformat() if since else None, "log_rows": rows}
+
 @router.post("/users/{user_id}/credits")
-async def adjust_user_credits(user_id: str, amount: int, admin: models.User = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
+async def adjust_user_credits(user_id: str, amount: int, admin: UserPrincipal = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
+    balance = CreditLedger.adjust_sync(db, user_id, amount)
+    if balance is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"id": user_id, "new_balance": balance}
+
+@router.patch("/users/{user_id}")
+async def update_user(user_id: str, tier: Optional[models.UserTier] = None, is_active: Optional[bool] = None, is_admin: Optional[bool] = None, admin: UserPrincipal = Depends(get_admin_user), db: Session = Depends(connection.get_db)):
+    """Change a user's plan tier or access flags."""
     user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+    if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    user.credits += amount
+    if tier is not None:
+        user.tier = tier.value
+    if is_active is not None:
+        user.is_active = is_active
+    if is_admin is not None:
+        user.is_admin = is_admin
     db.commit()
-    return {"id": user.id, "new_balance": user.credits}
+    PrincipalCache.invalidate(user_id)
+    return {"id": user.id, "tier": user.tier, "is_active": user.is_active, "is_admin": user.is_admin}
+
+@router.post("/auth-cache/invalidate")
+async def invalidate_auth_cache(user_id: Optional[str] = None, admin: UserPrincipal = Depends(get_admin_user)):
+    """Drop cached principals on this worker (one user, or all when no id is given); others expire within AUTH_PRINCIPAL_CACHE_TTL."""
+    if user_id:
+        PrincipalCache.invalidate(user_id)
+    else:
+        PrincipalCache.clear()
+    return {"status": "invalidated", "user_id": user_id, "cache": PrincipalCache.stats()}
+
+@router.post("/security/rules/reload")
+async def reload_security_rules(admin: UserPrincipal = Depends(get_admin_user)):
+    """Recompile the request scanner's rule set (SECURITY_RULES_FILE or the built-in list)."""
+    rules = SecurityEngine.reload()
+    return {"status": "reloaded", "version": rules.version, "rules": rules.names}
+
+@router.post("/storage/cleanup")
+async def cleanup_image_storage(admin: UserPrincipal = Depends(get_admin_user)):
+    """Run the generated-image retention sweep now instead of waiting for the next interval."""
+    return {"status": "cleaned", **(await asyncio.to_thread(ImageStorage.cleanup)), "stats": ImageStorage.snapshot()}
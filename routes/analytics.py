@@ -3,44 +3,50 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from database import connection, models
 from modules.auth.service import get_current_user
+from modules.auth.principal import UserPrincipal
 from sqlalchemy import func
 import datetime
 
 router = APIRouter()
 
 @router.get("/me")
-async def get_my_analytics(current_user: models.User = Depends(get_current_user), db: Session = Depends(connection.get_db)):
+async def get_my_analytics(current_user: UserPrincipal = Depends(get_current_user), db: Session = Depends(connection.get_db)):
+    rollup = models.UsageRollup
+    daily = db.query(rollup).filter(rollup.user_id == current_user.id, rollup.granularity == "day")
+
     # Summary stats
-    logs = db.query(models.UsageLog).filter(models.UsageLog.user_id == current_user.id).all()
-    
-    total_spent_credits = sum(log.credits_consumed for log in logs if log.credits_consumed)
-    total_tokens = sum(log.total_tokens for log in logs if log.total_tokens)
+    summary = daily.with_entities(
+        func.sum(rollup.requests), func.sum(rollup.credits_consumed), func.sum(rollup.total_tokens)
+    ).one()
+    total_requests = summary[0] or 0
+    total_spent_credits = summary[1] or 0
+    total_tokens = summary[2] or 0
     
     # 7-day usage trend
-    seven_days_ago = datetime.datetime.utcnow() - datetime.timedelta(days=7)
-    trend = db.query(
-        func.date(models.UsageLog.timestamp).label('date'),
-        func.count(models.UsageLog.id).label('count')
-    ).filter(
-        models.UsageLog.user_id == current_user.id,
-        models.UsageLog.timestamp >= seven_days_ago
-    ).group_by(func.date(models.UsageLog.timestamp)).all()
+    seven_days_ago = (datetime.datetime.utcnow() - datetime.timedelta(days=7)).replace(hour=0, minute=0, second=0, microsecond=0)
+    trend = daily.with_entities(
+        rollup.bucket_start.label('date'),
+        func.sum(rollup.requests).label('count')
+    ).filter(rollup.bucket_start >= seven_days_ago).group_by(rollup.bucket_start).all()
 
     # Tool breakdown
-    tools = db.query(
-        models.UsageLog.endpoint, 
-        func.count(models.UsageLog.id)
-    ).filter(models.UsageLog.user_id == current_user.id).group_by(models.UsageLog.endpoint).all()
+    tools = daily.with_entities(
+        rollup.endpoint, 
+        func.sum(rollup.requests)
+    ).group_by(rollup.endpoint).all()
+
+    # The cached principal only carries a last-known balance; show the live one
+    remaining = db.query(models.User.credits).filter(models.User.id == current_user.id).scalar()
 
     return {
         "credits": {
-            "remaining": current_user.credits,
+            "remaining": remaining if remaining is not None else current_user.credits,
             "total_spent": total_spent_credits
         },
         "usage": {
-            "total_requests": len(logs),
+            "total_requests": total_requests,
             "total_tokens": total_tokens,
-            "7_day_trend": {str(t.date): t.count for t in trend}
+            "7_day_trend": {str(t.date.date()): t.count for t in trend}
         },
         "tools_breakdown": {endpoint: count for endpoint, count in tools},
         "tier": current_user.tier
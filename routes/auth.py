@@ -2,7 +2,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import connection, models
 from modules.auth import service
 from schemas.auth import UserCreate, ForgotPasswordRequest, ResetPasswordRequest, UserLoginJSON
@@ -12,30 +14,41 @@ from typing import Optional
 
 router = APIRouter(prefix="/api/auth", tags=["Auth"])
 
+async def _authenticate(db: AsyncSession, email: str, password: str) -> Optional[models.User]:
+    user = (await db.execute(select(models.User).where(models.User.email == email))).scalar_one_or_none()
+    if not user:
+        return None
+    valid, new_hash = await service.verify_password_async(password, user.hashed_password)
+    if not valid:
+        return None
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS; upgrade it while we have the password
+        user.hashed_password = new_hash
+    return user
+
 @router.post("/register")
-def register(user_in: UserCreate, db: Session = Depends(connection.get_db)):
-    db_user = db.query(models.User).filter(models.User.email == user_in.email).first()
+async def register(user_in: UserCreate, db: AsyncSession = Depends(connection.get_async_db)):
+    db_user = (await db.execute(select(models.User).where(models.User.email == user_in.email))).scalar_one_or_none()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     user = models.User(
         id=str(uuid.uuid4()),
         email=user_in.email,
-        hashed_password=service.get_password_hash(user_in.password),
+        hashed_password=await service.get_password_hash_async(user_in.password),
         full_name=user_in.full_name,
         credits=15 # Bonus credits for registering
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     return {"status": "success", "user_id": user.id}
 
 @router.post("/login")
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(connection.get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(connection.get_async_db)):
     print(f"[DEBUG] FORM LOGIN ATTEMPT: {form_data.username}")
     try:
-        user = db.query(models.User).filter(models.User.email == form_data.username).first()
-        if not user or not service.verify_password(form_data.password, user.hashed_password):
+        user = await _authenticate(db, form_data.username, form_data.password)
+        if not user:
             print(f"[DEBUG] FORM LOGIN FAILED: {form_data.username}")
             return JSONResponse(
                 status_code=400,
@@ -43,7 +56,7 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             )
         
         user.last_login = datetime.datetime.utcnow()
-        db.commit()
+        await db.commit()
         
         access_token = service.create_access_token(data={"sub": user.id})
         return {
@@ -51,6 +64,8 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             "token_type": "bearer", 
             "full_name": user.full_name
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[DEBUG] CRITICAL FORM AUTH ERROR: {str(e)}")
         return JSONResponse(
@@ -59,11 +74,11 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
         )
 
 @router.post("/json-login")
-def json_login(credentials: UserLoginJSON, db: Session = Depends(connection.get_db)):
+async def json_login(credentials: UserLoginJSON, db: AsyncSession = Depends(connection.get_async_db)):
     print(f"[DEBUG] JSON LOGIN ATTEMPT: {credentials.email}")
     try:
-        user = db.query(models.User).filter(models.User.email == credentials.email).first()
-        if not user or not service.verify_password(credentials.password, user.hashed_password):
+        user = await _authenticate(db, credentials.email, credentials.password)
+        if not user:
             print(f"[DEBUG] JSON LOGIN FAILED: {credentials.email}")
             return JSONResponse(
                 status_code=400,
@@ -71,7 +86,7 @@ def json_login(credentials: UserLoginJSON, db: Session = Depends(connection.get_
             )
         
         user.last_login = datetime.datetime.utcnow()
-        db.commit()
+        await db.commit()
         
         access_token = service.create_access_token(data={"sub": user.id})
         return {
@@ -79,6 +94,8 @@ def json_login(credentials: UserLoginJSON, db: Session = Depends(connection.get_
             "token_type": "bearer", 
             "full_name": user.full_name
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[DEBUG] CRITICAL JSON AUTH ERROR: {str(e)}")
         return JSONResponse(
@@ -98,17 +115,17 @@ def forgot_password(req: ForgotPasswordRequest, db: Session = Depends(connection
     return {"message": "If the email exists, a reset link has been sent."}
 
 @router.post("/reset-password")
-def reset_password(req: ResetPasswordRequest, db: Session = Depends(connection.get_db)):
-    user = db.query(models.User).filter(
+async def reset_password(req: ResetPasswordRequest, db: AsyncSession = Depends(connection.get_async_db)):
+    user = (await db.execute(select(models.User).where(
         models.User.reset_token == req.token,
         models.User.reset_token_expiry > datetime.datetime.utcnow()
-    ).first()
+    ))).scalar_one_or_none()
     
     if not user:
         raise HTTPException(status_code=400, detail="Invalid or expired reset token")
     
-    user.hashed_password = service.get_password_hash(req.new_password)
+    user.hashed_password = await service.get_password_hash_async(req.new_password)
     user.reset_token = None
     user.reset_token_expiry = None
-    db.commit()
+    await db.commit()
     return {"status": "Password reset successful"}
@@ -1,106 +1,508 @@
 
 from fastapi import APIRouter, Depends, Request, HTTPException
-from sqlalchemy.orm import Session
-from database import connection, models, crud
-from modules.auth.service import get_current_user
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple, Union
+from database import connection, models
+from modules.auth.service import get_current_user_async
+from modules.auth.principal import UserPrincipal
 from modules.credits.service import CreditManager
+from modules.credits.ledger import CreditLedger, Reservation
 from schemas.branding import (
     NameRequest, ContentRequest, LogoRequest, AssistantRequest, 
-    SentimentRequest, VideoRequest, VoiceRequest, ResearchRequest, RoadmapRequest
+    SentimentRequest, SentimentBatchRequest, VideoRequest, VoiceRequest, ResearchRequest, RoadmapRequest,
+    BrandKitRequest, BatchRequest, ContextInput
 )
 from services.ai_router import AIRouter
 from services.context_manager import ContextManager
-from services.prompt_builder import PromptBuilder
+from services.prompt_builder import PromptBuilder, RenderedPrompt
+from services.providers.gemini_provider import GeminiProvider
+from services.job_queue import JobQueue, Job, JobStatus, check_callback_url
+from services.usage_writer import UsageLogWriter
+from services.admission import AdmissionController, AdmissionTimeout
+from services.routing_policy import provider_key
+from modules.plans.service import PlanService
 from core.security import SecurityEngine
+from core.config import settings
+from core.rate_limit import RateLimiter, parse_rate, headers_for
+from modules.plans.tiers import PLAN_LIMITS
+import asyncio
+import json
 import time
 
 router = APIRouter()
 
-async def get_valid_context(ctx_id: Optional[str]):
+def _name_prompt(req: NameRequest, ctx: Optional[ContextInput]) -> Union[str, RenderedPrompt]:
+    return PromptBuilder.build_brand_name_prompt(req, ctx) if ctx else req.vibe or "Professional"
+
+def _content_prompt(req: ContentRequest, ctx: Optional[ContextInput]) -> RenderedPrompt:
+    return PromptBuilder.build_content_prompt(req.type, ctx)
+
+async def _settle_call(db: AsyncSession, reservation: Reservation, call: Callable, unavailable: str) -> Dict[str, Any]:
+    """
+    Runs one provider call under a credit hold: an error result or a raised
+    exception refunds the hold and becomes a 503, success commits it.
+    """
+    try:
+        result = await call()
+    except AdmissionTimeout:
+        result = {"error": True, "message": f"{unavailable} capacity is saturated. Please retry shortly."}
+    except Exception:
+        result = {"error": True, "message": f"{unavailable} is temporarily unavailable."}
+    if "error" in result:
+        await reservation.refund(db)
+        raise HTTPException(status_code=503, detail=result.get("message") or f"{unavailable} is temporarily unavailable.")
+    reservation.commit()
+    return result
+
+async def get_valid_context(db: AsyncSession, ctx_id: Optional[str], user: UserPrincipal):
     if not ctx_id: return None
-    ctx = ContextManager.get_context(ctx_id)
+    ctx = await ContextManager.get_context(db, ctx_id, user.id)
     if not ctx: raise HTTPException(status_code=404, detail="Context not found")
     return ctx
 
 @router.post("/generate-name")
-async def generate_name(req: NameRequest, request: Request, user: models.User = Depends(get_current_user), db: Session = Depends(connection.get_db)):
+async def generate_name(req: NameRequest, request: Request, stream: bool = False, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
     start = time.time()
     endpoint = "/branding/generate-name"
-    cost = CreditManager.check_and_deduct(db, user, endpoint)
+    ctx = await get_valid_context(db, req.context_id, user)
+    reservation = await CreditManager.reserve(db, user, endpoint)
+    cost = reservation.amount
     
-    ctx = await get_valid_context(req.context_id)
-    prompt = PromptBuilder.build_brand_name_prompt(req, ctx) if ctx else req.vibe or "Professional"
+    prompt = _name_prompt(req, ctx)
     
-    result = await AIRouter.route_text("branding_names", prompt)
-    if "error" in result:
-        user.credits += cost
-        db.commit()
-        raise HTTPException(status_code=503, detail=result["message"])
+    if stream:
+        return stream_generation("branding_names", prompt, reservation, request.client.host, start)
+    
+    result = await _settle_call(db, reservation, lambda: AIRouter.route_text("branding_names", prompt), "Name generation")
     
-    crud.create_usage_log(db, user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
+    await UsageLogWriter.log(user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
     return result
 
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+def stream_generation(task: str, prompt: Union[str, RenderedPrompt], reservation: Reservation, ip: str, start: float, providers=None) -> StreamingResponse:
+    """Serves AIRouter.stream_text as Server-Sent Events and logs usage once the stream ends."""
+    async def settle(final: Optional[Dict[str, Any]]):
+        user_id, endpoint = reservation.user_id, reservation.endpoint
+        if final and final.get("done"):
+            reservation.commit()
+            await UsageLogWriter.log(user_id, endpoint, "POST", 200, time.time()-start, reservation.amount, ip, ai_metadata=final)
+        else:
+            async with connection.AsyncSessionLocal() as db:
+                await reservation.refund(db)
+            await UsageLogWriter.log(user_id, endpoint, "POST", 503, time.time()-start, 0, ip)
+
+    async def events():
+        final = None
+        try:
+            async with aclosing(AIRouter.stream_text(task, prompt, providers)) as stream:
+                async for event in stream:
+                    if event.get("done") or event.get("error"):
+                        final = event
+                    yield _sse(event)
+        except Exception:
+            final = {"error": True, "message": "Generation stream interrupted."}
+            yield _sse(final)
+        finally:
+            # Shielded so a client disconnect still settles the hold
+            await asyncio.shield(settle(final))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _run_logo_job(job: Job):
+    PlanService.bind_tier(job.payload.get("tier"))
+    result = await AIRouter.route_image(job.payload["prompt"])
+    if "error" in result:
+        # Fails the job so _finish_logo_job refunds the hold
+        raise RuntimeError(result.get("message") or "Logo generation is temporarily unavailable.")
+    return result
+
+async def _finish_logo_job(job: Job):
+    async with connection.AsyncSessionLocal() as db:
+        cost = job.payload["cost"]
+        if job.status == JobStatus.FAILED:
+            await CreditLedger.refund(db, job.owner_id, cost, job.payload["reservation_id"], "/branding/generate-logo")
+            await UsageLogWriter.log(job.owner_id, "/branding/generate-logo", "POST", 503, job.finished_at - job.created_at, 0, job.payload["ip"])
+        else:
+            await UsageLogWriter.log(job.owner_id, "/branding/generate-logo", "POST", 200, job.finished_at - job.created_at, cost, job.payload["ip"], ai_metadata=job.result)
+
+JobQueue.register("logo", _run_logo_job, on_complete=_finish_logo_job)
+
 @router.post("/generate-logo")
-async def generate_logo(req: LogoRequest, request: Request, user: models.User = Depends(get_current_user), db: Session = Depends(connection.get_db)):
+async def generate_logo(req: LogoRequest, request: Request, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
     start = time.time()
     endpoint = "/branding/generate-logo"
-    cost = CreditManager.check_and_deduct(db, user, endpoint)
+    if req.async_mode and req.callback_url:
+        try:
+            await check_callback_url(req.callback_url)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    ctx = await get_valid_context(db, req.context_id, user)
+    reservation = await CreditManager.reserve(db, user, endpoint)
+    cost = reservation.amount
     
-    ctx = await get_valid_context(req.context_id)
-    prompt = PromptBuilder.build_logo_prompt(req.prompt, ctx) if ctx else req.prompt
+    prompt = PromptBuilder.build_logo_prompt(req.prompt, ctx).text if ctx else req.prompt
     
-    result = await AIRouter.route_image(prompt)
-    crud.create_usage_log(db, user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
+    if req.async_mode:
+        try:
+            job = await JobQueue.submit(
+                "logo", {"prompt": prompt, "cost": cost, "reservation_id": reservation.id, "ip": request.client.host, "tier": user.tier},
+                owner_id=user.id, callback_url=req.callback_url
+            )
+        except asyncio.QueueFull:
+            await reservation.refund(db)
+            raise HTTPException(status_code=503, detail="Image queue is full. Please retry shortly.")
+        return JSONResponse(status_code=202, content={
+            "job_id": job.id,
+            "status": job.status.value,
+            "status_url": request.url_for('get_job_status', job_id=job.id).path
+        })
+    
+    result = await _settle_call(db, reservation, lambda: AIRouter.route_image(prompt), "Logo generation")
+    await UsageLogWriter.log(user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
     return result
 
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, user: UserPrincipal = Depends(get_current_user_async)):
+    job = await JobQueue.get(job_id)
+    if not job or job.owner_id != user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 @router.post("/sentiment")
-async def analyze_sentiment(req: SentimentRequest, request: Request, user: models.User = Depends(get_current_user), db: Session = Depends(connection.get_db)):
+async def analyze_sentiment(req: SentimentRequest, request: Request, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
     start = time.time()
     endpoint = "/branding/sentiment"
-    cost = CreditManager.check_and_deduct(db, user, endpoint)
+    reservation = await CreditManager.reserve(db, user, endpoint)
+    cost = reservation.amount
     
-    result = await AIRouter.route_sentiment(req.text)
-    crud.create_usage_log(db, user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
+    result = await _settle_call(db, reservation, lambda: AIRouter.route_sentiment(req.text), "Sentiment analysis")
+    await UsageLogWriter.log(user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
     return result
 
+@router.post("/sentiment/batch")
+async def analyze_sentiment_batch(req: SentimentBatchRequest, request: Request, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
+    start = time.time()
+    endpoint = "/branding/sentiment"
+    reservation = await CreditManager.reserve(db, user, endpoint, units=len(req.texts))
+    
+    try:
+        results, metadata = await AIRouter.route_sentiment_batch(req.texts)
+    except Exception:
+        # Treated as every item failing: the whole hold is refunded below
+        results, metadata = [{"error": True}], {}
+    failed = sum(1 for r in results if "error" in r)
+    if failed == len(results):
+        await reservation.refund(db)
+        raise HTTPException(status_code=503, detail="Sentiment analysis is temporarily unavailable.")
+    if failed:
+        await reservation.refund(db, CreditLedger.cost_for(endpoint, failed))
+    else:
+        reservation.commit()
+    cost = reservation.amount - CreditLedger.cost_for(endpoint, failed)
+    await UsageLogWriter.log(user.id, endpoint + "/batch", "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=metadata)
+    return {"results": results, "count": len(results), "failed": failed, "credits_charged": cost}
+
 @router.post("/generate-content")
-async def generate_content(req: ContentRequest, request: Request, user: models.User = Depends(get_current_user), db: Session = Depends(connection.get_db)):
+async def generate_content(req: ContentRequest, request: Request, stream: bool = False, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
     start = time.time()
     endpoint = "/branding/generate-content"
-    cost = CreditManager.check_and_deduct(db, user, endpoint)
+    ctx = await get_valid_context(db, req.context_id, user)
+    reservation = await CreditManager.reserve(db, user, endpoint)
+    cost = reservation.amount
     
-    ctx = await get_valid_context(req.context_id)
-    prompt = PromptBuilder.build_content_prompt(req.type, ctx) if ctx else f"Create {req.type} content."
+    prompt = _content_prompt(req, ctx)
     
-    result = await AIRouter.route_text("content", prompt)
-    crud.create_usage_log(db, user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
+    if stream:
+        return stream_generation("content", prompt, reservation, request.client.host, start)
+    
+    result = await _settle_call(db, reservation, lambda: AIRouter.route_text("content", prompt), "Content generation")
+    await UsageLogWriter.log(user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
     return result
 
+BRAND_KIT_ENDPOINT = "/branding/brand-kit"
+
+def _brand_kit_parts(req: BrandKitRequest, ctx: ContextInput) -> Dict[str, Tuple[str, Callable]]:
+    """part -> (endpoint the part is priced as, call). Every part shares the context's prompt prefix."""
+    parts = {
+        "names": ("/branding/generate-name", lambda: AIRouter.route_text(
+            "branding_names", PromptBuilder.build_brand_name_prompt(NameRequest(vibe=req.vibe), ctx)
+        )),
+    }
+    for c_type in ("tagline", "mission", "social"):
+        parts[c_type] = ("/branding/generate-content", lambda c_type=c_type: AIRouter.route_text(
+            "content", PromptBuilder.build_content_prompt(c_type, ctx)
+        ))
+    if req.include_logo:
+        logo_prompt = req.logo_prompt or f"a brand mark for a {ctx.industry} company"
+        parts["logo"] = ("/branding/generate-logo", lambda: AIRouter.route_image(
+            PromptBuilder.build_logo_prompt(logo_prompt, ctx).text
+        ))
+    return parts
+
+async def _run_part(name: str, call: Callable) -> Tuple[str, Dict[str, Any], float]:
+    started = time.time()
+    try:
+        result = await call()
+    except Exception:
+        result = {"error": True, "message": "Generation failed."}
+    return name, result, time.time() - started
+
+async def _fan_out(parts: Dict[str, Tuple[str, Callable]]) -> AsyncIterator[Tuple[str, Dict[str, Any], float]]:
+    """Runs every part concurrently and yields them in completion order; parts left over on exit are cancelled."""
+    tasks = [asyncio.ensure_future(_run_part(name, call)) for name, (_, call) in parts.items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
+
+async def _settle_parts(reservation: Reservation, outcomes: List[Tuple[str, Dict[str, Any], float, int]], ip: str) -> int:
+    """
+    Settles a composite call from (log endpoint, result, duration, cost) per
+    finished part: one refund covering every part that failed or never
+    finished, and one batch of usage rows. Returns the credits charged.
+    """
+    charged = sum(cost for _, result, _, cost in outcomes if "error" not in result)
+    if charged < reservation.amount:
+        async with connection.AsyncSessionLocal() as db:
+            await reservation.refund(db, reservation.amount - charged)
+    else:
+        reservation.commit()
+    await UsageLogWriter.log_batch([
+        {
+            "user_id": reservation.user_id, "endpoint": endpoint, "method": "POST",
+            "status": 503 if "error" in result else 200, "duration": duration,
+            "credits": 0 if "error" in result else cost,
+            "ip": ip, "ai_metadata": None if "error" in result else result
+        }
+        for endpoint, result, duration, cost in outcomes
+    ])
+    return charged
+
+def _kit_outcomes(parts: Dict[str, Tuple[str, Callable]], finished: List[tuple]) -> List[tuple]:
+    return [
+        (f"{BRAND_KIT_ENDPOINT}/{name}", result, duration, CreditLedger.cost_for(parts[name][0]))
+        for name, result, duration in finished
+    ]
+
+@router.post("/brand-kit")
+async def generate_brand_kit(req: BrandKitRequest, request: Request, stream: bool = False, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
+    """
+    Names, tagline, mission, social captions and (optionally) a logo for one
+    context in a single call: credits are held once for the whole kit, the
+    parts run concurrently, and failed parts are refunded together at the end.
+    With ?stream=true each part is sent as a Server-Sent Event as soon as it finishes.
+    """
+    start = time.time()
+    ctx = await get_valid_context(db, req.context_id, user)
+    parts = _brand_kit_parts(req, ctx)
+    reservation = await CreditManager.reserve(
+        db, user, BRAND_KIT_ENDPOINT, amount=sum(CreditLedger.cost_for(endpoint) for endpoint, _ in parts.values())
+    )
+    ip = request.client.host
+
+    if stream:
+        async def events():
+            outcomes = []
+            try:
+                # aclosing: a disconnect cancels the still-running parts now, not at GC
+                async with aclosing(_fan_out(parts)) as fan_out:
+                    async for outcome in fan_out:
+                        outcomes.append(outcome)
+                        name, result, _ = outcome
+                        yield _sse({"part": name, "result": result})
+            finally:
+                # Shielded so a client disconnect cannot strand the hold
+                charged = await asyncio.shield(_settle_parts(reservation, _kit_outcomes(parts, outcomes), ip))
+            yield _sse({"done": True, "credits_charged": charged, "duration": round(time.time() - start, 3)})
+
+        return StreamingResponse(
+            events(),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    async with aclosing(_fan_out(parts)) as fan_out:
+        outcomes = [outcome async for outcome in fan_out]
+    charged = await _settle_parts(reservation, _kit_outcomes(parts, outcomes), ip)
+    results = {name: result for name, result, _ in outcomes}
+    return {
+        "parts": {name: results[name] for name in parts},
+        "credits_charged": charged,
+        "duration": round(time.time() - start, 3)
+    }
+
+BATCH_ENDPOINT = "/branding/batch"
+
+def _pack_groups(tasks: List[str], prompts: List[Union[str, RenderedPrompt]]) -> List[List[int]]:
+    """Item indexes per provider call: templated prompts with the same task and context prefix are packed together."""
+    groups: Dict[tuple, List[int]] = {}
+    singles = []
+    for i, (task, prompt) in enumerate(zip(tasks, prompts)):
+        if isinstance(prompt, RenderedPrompt):
+            groups.setdefault((task, prompt.prefix_key), []).append(i)
+        else:
+            singles.append([i])
+    size = max(1, settings.BATCH_PACK_SIZE)
+    return [indexes[n:n + size] for indexes in groups.values() for n in range(0, len(indexes), size)] + singles
+
+def _packed_share(result: Dict[str, Any], text: str, count: int) -> Dict[str, Any]:
+    # Token usage and provider cost of a packed call are split evenly across its items
+    return {
+        **result,
+        "text": text,
+        "usage": {key: value // count for key, value in result["usage"].items()},
+        "cost_estimate": result.get("cost_estimate", 0.0) / count,
+        "packed": count
+    }
+
+async def _run_batch(tasks: List[str], prompts: List[Union[str, RenderedPrompt]], pack: bool) -> List[Tuple[Dict[str, Any], float]]:
+    """
+    (result, duration) per item. At most BATCH_CONCURRENCY provider calls are
+    in flight for one batch; items unfinished after BATCH_TIMEOUT are failed.
+    """
+    started = time.time()
+    semaphore = asyncio.Semaphore(max(1, settings.BATCH_CONCURRENCY))
+    results: List[Optional[Tuple[Dict[str, Any], float]]] = [None] * len(prompts)
+
+    async def run(indexes: List[int]):
+        async with semaphore:
+            if len(indexes) == 1:
+                i = indexes[0]
+                _, result, duration = await _run_part(i, lambda: AIRouter.route_text(tasks[i], prompts[i]))
+                results[i] = (result, duration)
+                return
+            _, result, duration = await _run_part(
+                indexes[0], lambda: AIRouter.route_text(tasks[indexes[0]], PromptBuilder.pack([prompts[i] for i in indexes]))
+            )
+        answers = None if "error" in result else PromptBuilder.unpack(result["text"], len(indexes))
+        if answers is None:
+            # The provider failed or ignored the markers: retry each item on its own
+            await asyncio.gather(*(run([i]) for i in indexes))
+            return
+        for i, text in zip(indexes, answers):
+            results[i] = (_packed_share(result, text, len(indexes)), duration)
+
+    groups = _pack_groups(tasks, prompts) if pack else [[i] for i in range(len(prompts))]
+    runs = [asyncio.ensure_future(run(indexes)) for indexes in groups]
+    try:
+        await asyncio.wait(runs, timeout=settings.BATCH_TIMEOUT if settings.BATCH_TIMEOUT > 0 else None)
+    finally:
+        for task in runs:
+            task.cancel()
+        await asyncio.gather(*runs, return_exceptions=True)
+    expired = ({"error": True, "message": "Batch time limit reached before this item finished."}, time.time() - started)
+    return [outcome or expired for outcome in results]
+
+async def _charge_batch_rate(user: UserPrincipal, count: int):
+    """Spends one plan rate-limit token per batch item; RateLimitGuard already took one for the request."""
+    if not settings.RATE_LIMIT_ENABLED or count <= 1:
+        return
+    rate = parse_rate(PLAN_LIMITS.get(user.tier, PLAN_LIMITS[models.UserTier.FREE])["rate_limit"])
+    if rate is None:
+        return
+    if count > rate[0]:
+        raise HTTPException(status_code=422, detail=f"Batch is limited to {rate[0]} items on your plan")
+    decision = await RateLimiter.hit(f"user:{user.id}", rate, cost=count - 1)
+    if decision is not None and not decision.allowed:
+        raise HTTPException(status_code=429, detail="Rate limit exceeded. Please slow down.", headers=headers_for(decision))
+
+@router.post("/batch")
+async def generate_batch(req: BatchRequest, request: Request, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
+    """
+    Bulk /generate-name and /generate-content: one auth, one credit hold for
+    the whole batch, items scheduled through AIRouter with bounded concurrency
+    and, with pack=true, several prompts per provider call. Failed items are
+    refunded together; results keep the order of the request (names first).
+    """
+    start = time.time()
+    count = len(req.names) + len(req.contents)
+    if count == 0:
+        raise HTTPException(status_code=422, detail="Batch has no items")
+    if count > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Batch is limited to {settings.BATCH_MAX_ITEMS} items")
+
+    await _charge_batch_rate(user, count)
+
+    contexts: Dict[str, ContextInput] = {}
+    for ctx_id in dict.fromkeys(item.context_id for item in [*req.names, *req.contents] if item.context_id):
+        contexts[ctx_id] = await get_valid_context(db, ctx_id, user)
+
+    kinds, tasks, prompts, costs = [], [], [], []
+    for item in req.names:
+        kinds.append("name")
+        tasks.append("branding_names")
+        prompts.append(_name_prompt(item, contexts.get(item.context_id)))
+        costs.append(CreditLedger.cost_for("/branding/generate-name"))
+    for item in req.contents:
+        kinds.append("content")
+        tasks.append("content")
+        prompts.append(_content_prompt(item, contexts.get(item.context_id)))
+        costs.append(CreditLedger.cost_for("/branding/generate-content"))
+
+    reservation = await CreditManager.reserve(db, user, BATCH_ENDPOINT, amount=sum(costs))
+    outcomes = await _run_batch(tasks, prompts, req.pack)
+    charged = await _settle_parts(reservation, [
+        (f"{BATCH_ENDPOINT}/{kind}", result, duration, cost)
+        for kind, (result, duration), cost in zip(kinds, outcomes, costs)
+    ], request.client.host)
+
+    items = [
+        {"index": i, "kind": kind, "credits": 0 if "error" in result else cost, **result}
+        for i, (kind, (result, _), cost) in enumerate(zip(kinds, outcomes, costs))
+    ]
+    return {
+        "results": items,
+        "count": count,
+        "failed": sum(1 for item in items if "error" in item),
+        "credits_charged": charged,
+        "duration": round(time.time() - start, 3)
+    }
+
 @router.post("/roadmap")
-async def generate_roadmap(req: RoadmapRequest, request: Request, user: models.User = Depends(get_current_user), db: Session = Depends(connection.get_db)):
+async def generate_roadmap(req: RoadmapRequest, request: Request, stream: bool = False, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
     start = time.time()
     endpoint = "/branding/roadmap"
-    cost = CreditManager.check_and_deduct(db, user, endpoint)
+    ctx = await get_valid_context(db, req.context_id, user)
+    reservation = await CreditManager.reserve(db, user, endpoint)
+    cost = reservation.amount
+    
+    prompt = PromptBuilder.build_roadmap_prompt(ctx)
     
-    ctx = await get_valid_context(req.context_id)
-    prompt = f"Create a 7-day marketing roadmap for {ctx.industry if ctx else 'a new brand'} in JSON format."
+    if stream:
+        return stream_generation("roadmap", prompt, reservation, request.client.host, start)
     
-    result = await AIRouter.route_text("roadmap", prompt)
-    crud.create_usage_log(db, user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
+    result = await _settle_call(db, reservation, lambda: AIRouter.route_text("roadmap", prompt), "Roadmap generation")
+    await UsageLogWriter.log(user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
     return result
 
 @router.post("/research")
-async def research_industry(req: ResearchRequest, request: Request, user: models.User = Depends(get_current_user), db: Session = Depends(connection.get_db)):
+async def research_industry(req: ResearchRequest, request: Request, stream: bool = False, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
     start = time.time()
     endpoint = "/branding/research"
-    cost = CreditManager.check_and_deduct(db, user, endpoint)
+    ctx = await get_valid_context(db, req.context_id, user)
+    reservation = await CreditManager.reserve(db, user, endpoint)
+    cost = reservation.amount
     
-    ctx = await get_valid_context(req.context_id)
-    prompt = f"Research market trends for {ctx.industry if ctx else 'emerging markets'}."
+    prompt = PromptBuilder.build_research_prompt(ctx)
     
     # Force Gemini for search grounding
     provider = GeminiProvider(model_name='gemini-3-flash-preview')
-    result = await provider.generate_text(prompt) # In real implementation, pass tools here
+    if stream:
+        return stream_generation("research", prompt, reservation, request.client.host, start, providers=[provider])
+    async def call():
+        async with AdmissionController.slot(provider_key(provider)):
+            return await provider.generate_text(prompt.text) # In real implementation, pass tools here
+    result = await _settle_call(db, reservation, call, "Research")
     
-    crud.create_usage_log(db, user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
+    await UsageLogWriter.log(user.id, endpoint, "POST", 200, time.time()-start, cost, request.client.host, ai_metadata=result)
     return result
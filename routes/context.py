@@ -1,24 +1,34 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import connection
+from modules.auth.service import get_current_user_async
+from modules.auth.principal import UserPrincipal
 from schemas.branding import ContextInput
 from services.context_manager import ContextManager
 
 router = APIRouter()
 
 @router.post("/create")
-async def create_context(data: ContextInput):
-    ctx_id = ContextManager.create_context(data)
+async def create_context(data: ContextInput, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
+    ctx_id = await ContextManager.create_context(db, user.id, data)
     return {"context_id": ctx_id, "message": "Context synchronized"}
 
 @router.get("/{ctx_id}")
-async def get_context(ctx_id: str):
-    ctx = ContextManager.get_context(ctx_id)
+async def get_context(ctx_id: str, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
+    ctx = await ContextManager.get_context(db, ctx_id, user.id)
     if not ctx:
         raise HTTPException(status_code=404, detail="Context ID expired or invalid")
     return ctx
 
 @router.put("/{ctx_id}")
-async def update_context(ctx_id: str, data: ContextInput):
-    success = ContextManager.update_context(ctx_id, data)
+async def update_context(ctx_id: str, data: ContextInput, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
+    success = await ContextManager.update_context(db, ctx_id, user.id, data)
     if not success:
         raise HTTPException(status_code=404, detail="Update failed")
-    return {"status": "updated"}
\ No newline at end of file
+    return {"status": "updated"}
+
+@router.delete("/{ctx_id}")
+async def delete_context(ctx_id: str, user: UserPrincipal = Depends(get_current_user_async), db: AsyncSession = Depends(connection.get_async_db)):
+    if not await ContextManager.delete_context(db, ctx_id, user.id):
+        raise HTTPException(status_code=404, detail="Context not found")
+    return {"status": "deleted"}
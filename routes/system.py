@@ -6,7 +6,16 @@ import time
 import psutil
 import os
 from core.config import settings
-import google.generativeai as genai
+from services.prompt_cache import PromptCache
+from services.providers.executor import ProviderExecutor
+from services.circuit_breaker import CircuitBreaker, CLOSED, OPEN
+from services.usage_writer import UsageLogWriter
+from modules.auth.principal import PrincipalCache
+from modules.auth.hashing import PasswordHasher
+from core.rate_limit import RateLimiter
+from services.admission import AdmissionController
+from services.context_manager import ContextManager
+from services.image_storage import ImageStorage
 
 router = APIRouter()
 start_time = time.time()
@@ -30,13 +39,17 @@ async def health(db: Session = Depends(get_db)):
 
 @router.get("/status", tags=["System"])
 async def status():
-    # Check Gemini Connection
-    gemini_status = "unknown"
-    try:
-        genai.configure(api_key=settings.API_KEY)
-        gemini_status = "connected"
-    except Exception:
+    # Provider health comes from observed call outcomes, not from SDK configuration
+    providers = CircuitBreaker.all_health()
+    gemini = [h for name, h in providers.items() if name.startswith("GeminiProvider")]
+    if not gemini:
+        gemini_status = "unknown"
+    elif all(h["state"] == OPEN for h in gemini):
         gemini_status = "error"
+    elif any(h["state"] != CLOSED for h in gemini):
+        gemini_status = "degraded"
+    else:
+        gemini_status = "connected"
 
     return {
         "uptime": f"{time.time() - start_time:.2f}s",
@@ -46,13 +59,60 @@ async def status():
             "gemini": gemini_status,
             "static_dir": os.path.exists(settings.STATIC_DIR)
         },
+        "providers": providers,
         "version": "2.0.0-prod"
     }
 
 @router.get("/metrics", tags=["System"])
 async def metrics():
     uptime = time.time() - start_time
+    cache = PromptCache.stats()
+    lines = [
+        f"brandcraft_uptime_seconds {uptime}",
+        f"brandcraft_memory_bytes {psutil.Process(os.getpid()).memory_info().rss}",
+        f"brandcraft_prompt_cache_hits_total {cache['hits']}",
+        f"brandcraft_prompt_cache_misses_total {cache['misses']}",
+        f"brandcraft_prompt_cache_evictions_total {cache['evictions']}",
+    ]
+    for name, stats in ProviderExecutor.all_stats().items():
+        lines.append(f'brandcraft_executor_queued{{provider="{name}"}} {stats["queued"]}')
+        lines.append(f'brandcraft_executor_active{{provider="{name}"}} {stats["active"]}')
+        lines.append(f'brandcraft_executor_timeouts_total{{provider="{name}"}} {stats["timeouts"]}')
+        lines.append(f'brandcraft_executor_avg_queue_wait_ms{{provider="{name}"}} {stats["avg_queue_wait_ms"]}')
+    for name, value in UsageLogWriter.stats.items():
+        lines.append(f"brandcraft_usage_log_{name}_total {value}")
+    lines.append(f"brandcraft_usage_log_queue_depth {UsageLogWriter._queue.qsize() if UsageLogWriter._queue else 0}")
+    for name, value in PasswordHasher.snapshot().items():
+        lines.append(f"brandcraft_password_hash_{name} {value}")
+    for name, budget in AdmissionController.all_stats().items():
+        lines.append(f'brandcraft_provider_in_flight{{provider="{name}"}} {budget["in_flight"]}')
+        lines.append(f'brandcraft_provider_concurrency_limit{{provider="{name}"}} {budget["limit"]}')
+        for tier, stats in budget["tiers"].items():
+            labels = f'provider="{name}",tier="{tier}"'
+            lines.append(f'brandcraft_admission_queued{{{labels}}} {stats["queued"]}')
+            lines.append(f'brandcraft_admission_granted_total{{{labels}}} {stats["granted"]}')
+            lines.append(f'brandcraft_admission_timeouts_total{{{labels}}} {stats["timeouts"]}')
+            lines.append(f'brandcraft_admission_avg_wait_ms{{{labels}}} {stats["avg_wait_ms"]}')
+            lines.append(f'brandcraft_admission_max_wait_ms{{{labels}}} {stats["max_wait_ms"]}')
+    for name, value in RateLimiter.stats.items():
+        lines.append(f"brandcraft_rate_limit_{name}_total {value}")
+    contexts = ContextManager.cache_stats()
+    lines.append(f"brandcraft_context_cache_size {contexts.pop('size')}")
+    for name, value in contexts.items():
+        lines.append(f"brandcraft_context_cache_{name}_total {value}")
+    for name, value in ImageStorage.snapshot().items():
+        lines.append(f"brandcraft_image_storage_{name}_total {value}")
+    principals = PrincipalCache.stats()
+    lines.append(f"brandcraft_auth_cache_size {principals.pop('size')}")
+    for name, value in principals.items():
+        lines.append(f"brandcraft_auth_cache_{name}_total {value}")
+    for name, health in CircuitBreaker.all_health().items():
+        lines.append(f'brandcraft_provider_circuit_open{{provider="{name}"}} {int(health["state"] == OPEN)}')
+        lines.append(f'brandcraft_provider_health_score{{provider="{name}"}} {health["score"]}')
+        lines.append(f'brandcraft_provider_error_rate{{provider="{name}"}} {health["error_rate"]}')
+        lines.append(f'brandcraft_provider_p95_latency_seconds{{provider="{name}"}} {health["p95_latency_s"]}')
+        lines.append(f'brandcraft_provider_rejected_total{{provider="{name}"}} {health["rejected"]}')
     return Response(
-        content=f"brandcraft_uptime_seconds {uptime}\nbrandcraft_memory_bytes {psutil.Process(os.getpid()).memory_info().rss}",
+        content="\n".join(lines),
         media_type="text/plain"
     )
@@ -1,6 +1,6 @@
 
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, List, Optional
 
 class ContextInput(BaseModel):
     industry: str = Field(..., example="Fintech")
@@ -8,6 +8,8 @@ class ContextInput(BaseModel):
     keywords: List[str] = Field(default_factory=list)
     target_audience: str = Field(..., example="Gen Z Investors")
     brand_personality: str = Field(default="innovative")
+    # Rendered prompt prefix, filled in lazily by PromptBuilder.context_block
+    _prompt_block: Any = PrivateAttr(default=None)
 
 class NameRequest(BaseModel):
     context_id: Optional[str] = None
@@ -22,10 +24,26 @@ class LogoRequest(BaseModel):
     prompt: str
     style: Optional[str] = "minimalist"
     context_id: Optional[str] = None
+    async_mode: bool = False
+    callback_url: Optional[str] = Field(default=None, pattern="^https?://")
+
+class BrandKitRequest(BaseModel):
+    context_id: str
+    vibe: Optional[str] = None
+    logo_prompt: Optional[str] = None
+    include_logo: bool = True
+
+class BatchRequest(BaseModel):
+    names: List[NameRequest] = Field(default_factory=list)
+    contents: List[ContentRequest] = Field(default_factory=list)
+    pack: bool = False  # several small prompts per provider call, split back per item
 
 class SentimentRequest(BaseModel):
     text: str
 
+class SentimentBatchRequest(BaseModel):
+    texts: List[str] = Field(..., min_length=1, max_length=500)
+
 class AssistantRequest(BaseModel):
     message: str
     history: List[dict] = []
@@ -0,0 +1,173 @@
+
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+import asyncio
+import logging
+import threading
+import time
+from core.config import settings
+from modules.plans.service import PlanService
+
+logger = logging.getLogger("brandcraft.admission")
+
+STRICT = "strict"
+WEIGHTED = "weighted"
+
+class AdmissionTimeout(Exception):
+    """Raised when a call waited longer than SCHEDULER_MAX_QUEUE_WAIT for a provider slot."""
+
+class ProviderBudget:
+    """
+    Concurrency budget for one provider with a wait queue per plan tier.
+
+    A released slot is handed straight to the next waiter, chosen either by
+    strict priority (priority plans, then weight) or weighted-fair: each tier
+    advances a virtual clock by 1/weight per grant and the tier with the
+    earliest clock goes next, so free-tier bursts keep a share of the capacity
+    without delaying paid tiers behind them.
+    """
+
+    def __init__(self, name: str, limit: int, policy: str):
+        self.name = name
+        self.limit = limit
+        self.policy = policy
+        self.in_flight = 0
+        self._queues: Dict[str, Deque[Tuple[asyncio.Future, float]]] = {}
+        self._vtime: Dict[str, float] = {}
+        self._clock = 0.0
+        self.stats: Dict[str, Dict[str, float]] = {}
+
+    def _tier_stats(self, tier: str) -> Dict[str, float]:
+        stats = self.stats.get(tier)
+        if stats is None:
+            stats = self.stats[tier] = {"granted": 0, "timeouts": 0, "wait_total": 0.0, "wait_max": 0.0}
+        return stats
+
+    def queued(self, tier: Optional[str] = None) -> int:
+        if tier is not None:
+            return len(self._queues.get(tier, ()))
+        return sum(len(q) for q in self._queues.values())
+
+    def _record_wait(self, tier: str, waited: float):
+        stats = self._tier_stats(tier)
+        stats["granted"] += 1
+        stats["wait_total"] += waited
+        stats["wait_max"] = max(stats["wait_max"], waited)
+
+    def _next_tier(self) -> Optional[str]:
+        waiting = [tier for tier, queue in self._queues.items() if queue]
+        if not waiting:
+            return None
+        if self.policy == STRICT:
+            return min(waiting, key=PlanService.scheduling_rank)
+        return min(waiting, key=lambda tier: (self._vtime.get(tier, 0.0), PlanService.scheduling_rank(tier)))
+
+    def _grant_next(self):
+        while True:
+            tier = self._next_tier()
+            if tier is None:
+                self.in_flight -= 1
+                return
+            future, enqueued = self._queues[tier].popleft()
+            if future.done():
+                continue
+            self._clock = self._vtime.get(tier, 0.0)
+            self._vtime[tier] = self._clock + 1.0 / PlanService.scheduling_weight(tier)
+            self._record_wait(tier, time.monotonic() - enqueued)
+            # The slot passes directly to the waiter; in_flight is unchanged
+            future.set_result(None)
+            return
+
+    async def acquire(self, tier: str, timeout: float):
+        if self.in_flight < self.limit and not self.queued():
+            self.in_flight += 1
+            self._record_wait(tier, 0.0)
+            return
+
+        queue = self._queues.get(tier)
+        if queue is None:
+            queue = self._queues[tier] = deque()
+        if not queue:
+            # An idle tier rejoins at the current clock instead of cashing in credit from its idle time
+            self._vtime[tier] = max(self._vtime.get(tier, 0.0), self._clock)
+        future = asyncio.get_running_loop().create_future()
+        entry = (future, time.monotonic())
+        queue.append(entry)
+        try:
+            await asyncio.wait_for(future, timeout=timeout)
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # Granted just as we gave up: pass the slot on
+                self._grant_next()
+            else:
+                future.cancel()
+                try:
+                    queue.remove(entry)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                self._tier_stats(tier)["timeouts"] += 1
+                raise AdmissionTimeout(f"{self.name}: no capacity within {timeout:g}s") from None
+            raise
+
+    def release(self):
+        self._grant_next()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "tiers": {
+                tier: {
+                    "queued": self.queued(tier),
+                    "granted": stats["granted"],
+                    "timeouts": stats["timeouts"],
+                    "avg_wait_ms": round(stats["wait_total"] / stats["granted"] * 1000, 2) if stats["granted"] else 0.0,
+                    "max_wait_ms": round(stats["wait_max"] * 1000, 2),
+                }
+                for tier, stats in self.stats.items()
+            }
+        }
+
+class AdmissionController:
+    """Per-provider budgets shared by every AI call path in the worker."""
+    _budgets: Dict[str, ProviderBudget] = {}
+    _limits: Optional[Dict[str, int]] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def _limit_for(cls, provider: str) -> int:
+        if cls._limits is None:
+            limits = {}
+            for item in filter(None, settings.PROVIDER_CONCURRENCY.split(",")):
+                name, _, value = item.partition("=")
+                limits[name.strip()] = int(value)
+            cls._limits = limits
+        return cls._limits.get(provider, settings.PROVIDER_MAX_CONCURRENCY)
+
+    @classmethod
+    def budget(cls, key: str) -> ProviderBudget:
+        # Budgets are per provider (class name), shared by all of its models
+        provider = key.split(":", 1)[0]
+        budget = cls._budgets.get(provider)
+        if budget is None:
+            with cls._lock:
+                budget = cls._budgets.get(provider)
+                if budget is None:
+                    budget = cls._budgets[provider] = ProviderBudget(provider, cls._limit_for(provider), settings.SCHEDULER_POLICY)
+        return budget
+
+    @classmethod
+    @asynccontextmanager
+    async def slot(cls, key: str) -> AsyncIterator[None]:
+        budget = cls.budget(key)
+        await budget.acquire(PlanService.current_tier(), settings.SCHEDULER_MAX_QUEUE_WAIT)
+        try:
+            yield
+        finally:
+            budget.release()
+
+    @classmethod
+    def all_stats(cls) -> Dict[str, Dict[str, Any]]:
+        return {name: budget.snapshot() for name, budget in cls._budgets.items()}
@@ -1,5 +1,5 @@
 
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 import logging
 import asyncio
 import time
@@ -7,7 +7,14 @@ from services.providers.gemini_provider import GeminiProvider
 from services.providers.openai_provider import OpenAIProvider
 from services.providers.stable_diffusion_provider import StableDiffusionProvider
 from services.providers.huggingface_provider import HuggingFaceProvider
+from services.providers.local_sentiment_provider import LocalSentimentProvider
+from core.config import settings
 from services.providers.base import AIProvider
+from services.prompt_cache import PromptCache
+from services.prompt_builder import RenderedPrompt
+from services.routing_policy import RoutingPolicy, provider_key
+from services.circuit_breaker import CircuitBreaker
+from services.admission import AdmissionController, AdmissionTimeout
 
 logger = logging.getLogger("brandcraft.router")
 
@@ -19,6 +26,9 @@ class AIRouter:
     
     _sd_provider = StableDiffusionProvider()
     _hf_provider = HuggingFaceProvider()
+    _local_sentiment: Optional[LocalSentimentProvider] = (
+        LocalSentimentProvider() if settings.SENTIMENT_BACKEND == "local" else None
+    )
 
     @staticmethod
     def estimate_cost(provider: str, model: str, prompt_tokens: int, completion_tokens: int) -> float:
@@ -30,39 +40,214 @@ class AIRouter:
         rate = prices.get(provider, {}).get(model, 0.0002)
         return ((prompt_tokens + completion_tokens) / 1000.0) * rate
 
+    @staticmethod
+    def _provider_chain(providers: List[AIProvider]) -> str:
+        return ",".join(f"{type(p).__name__}:{getattr(p, 'model_name', '')}" for p in providers)
+
+    @staticmethod
+    def _unpack(payload: Union[str, RenderedPrompt]) -> Tuple[str, Optional[str], Dict[str, Any]]:
+        """Prompt text, cache fingerprint and provider kwargs (prefix-cache hint) for a payload."""
+        if isinstance(payload, RenderedPrompt):
+            return payload.text, payload.fingerprint, ({"prefix_key": payload.prefix_key} if payload.prefix_key else {})
+        return payload, None, {}
+
+    @classmethod
+    async def route_text(cls, task: str, payload: Union[str, RenderedPrompt]) -> Dict[str, Any]:
+        payload, fingerprint, hints = cls._unpack(payload)
+        cache_key = PromptCache.make_key(task, cls._provider_chain(cls._text_providers), payload, fingerprint)
+        cached = await PromptCache.get(cache_key)
+        if cached is not None:
+            # Nothing was spent upstream for a cache hit
+            return {
+                **cached,
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                "cost_estimate": 0.0,
+                "cached": True
+            }
+
+        mode = RoutingPolicy.mode_for(task)
+        try:
+            result = await RoutingPolicy.execute(mode, cls._text_providers, lambda p: p.generate_text(payload, **hints))
+        except Exception:
+            return {"error": True, "message": "No text providers available."}
+
+        result["cost_estimate"] = cls.estimate_cost(
+            result["provider"], result["model"],
+            result["usage"]["prompt_tokens"], result["usage"]["completion_tokens"]
+        )
+        await PromptCache.set(cache_key, dict(result))
+        return result
+
     @classmethod
-    async def route_text(cls, task: str, payload: str) -> Dict[str, Any]:
-        for provider in cls._text_providers:
+    async def stream_text(cls, task: str, payload: Union[str, RenderedPrompt], providers: Optional[List[AIProvider]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streams {"delta": str} chunks, then a final {"done": True, ...} event carrying
+        usage and cost_estimate. Falls back to the next provider only if the current
+        one fails before emitting any text.
+        """
+        providers = providers or cls._text_providers
+        payload, fingerprint, hints = cls._unpack(payload)
+        cache_key = PromptCache.make_key(task, cls._provider_chain(providers), payload, fingerprint)
+        cached = await PromptCache.get(cache_key)
+        if cached is not None:
+            yield {"delta": cached["text"]}
+            yield {
+                "done": True, "provider": cached["provider"], "model": cached["model"],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                "cost_estimate": 0.0, "cached": True
+            }
+            return
+
+        for provider in providers:
+            breaker = CircuitBreaker.for_key(provider_key(provider))
+            if not breaker.allow():
+                continue
+            parts: List[str] = []
+            settled = False
+            started = time.monotonic()
             try:
-                result = await provider.generate_text(payload)
-                result["cost_estimate"] = cls.estimate_cost(
-                    result["provider"], result["model"],
-                    result["usage"]["prompt_tokens"], result["usage"]["completion_tokens"]
-                )
-                return result
+                # The provider slot is held for the life of the stream
+                async with AdmissionController.slot(provider_key(provider)):
+                    started = time.monotonic()
+                    async for event in provider.stream_text(payload, **hints):
+                        if event.get("done"):
+                            settled = True
+                            breaker.record(True, time.monotonic() - started)
+                            usage = event["usage"]
+                            event["cost_estimate"] = cls.estimate_cost(
+                                event["provider"], event["model"],
+                                usage["prompt_tokens"], usage["completion_tokens"]
+                            )
+                            await PromptCache.set(cache_key, {
+                                "text": "".join(parts), "provider": event["provider"],
+                                "model": event["model"], "usage": usage,
+                                "cost_estimate": event["cost_estimate"]
+                            })
+                            yield event
+                            return
+                        parts.append(event["delta"])
+                        yield event
+            except AdmissionTimeout as e:
+                logger.warning(f"Text Provider stream skipped: {str(e)}")
+                continue
             except Exception as e:
-                logger.warning(f"Text Provider failed: {str(e)}")
+                settled = True
+                breaker.record(False, time.monotonic() - started)
+                if parts:
+                    raise
+                logger.warning(f"Text Provider stream failed: {str(e)}")
                 continue
-        return {"error": True, "message": "No text providers available."}
+            finally:
+                if not settled:
+                    breaker.release()
+        yield {"error": True, "message": "No text providers available."}
 
     @classmethod
     async def route_image(cls, prompt: str) -> Dict[str, Any]:
+        breaker = CircuitBreaker.for_key("StableDiffusionProvider:sdxl")
+        if breaker.allow():
+            started = time.monotonic()
+            try:
+                # Prefer SD for high-end logos
+                async with AdmissionController.slot("StableDiffusionProvider:sdxl"):
+                    started = time.monotonic()
+                    url = await cls._sd_provider.generate_logo(prompt)
+                breaker.record(True, time.monotonic() - started)
+                return {
+                    "url": url,
+                    "provider": "stability",
+                    "model": "sdxl",
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                    "cost_estimate": 0.05
+                }
+            except AdmissionTimeout:
+                breaker.release()
+            except Exception:
+                breaker.record(False, time.monotonic() - started)
+
+        # Fallback to Gemini Image
+        provider = GeminiProvider(model_name='gemini-2.5-flash-image')
         try:
-            # Prefer SD for high-end logos
-            url = await cls._sd_provider.generate_logo(prompt)
-            return {
-                "url": url,
-                "provider": "stability",
-                "model": "sdxl",
-                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
-                "cost_estimate": 0.05
-            }
-        except Exception:
-            # Fallback to Gemini Image
-            provider = GeminiProvider(model_name='gemini-2.5-flash-image')
-            res = await provider.generate_text(f"Generate logo: {prompt}")
-            return res
+            async with AdmissionController.slot(provider_key(provider)):
+                return await provider.generate_text(f"Generate logo: {prompt}")
+        except AdmissionTimeout as e:
+            logger.warning(f"Image fallback skipped: {str(e)}")
+            return {"error": True, "message": "Image providers are saturated. Please retry shortly."}
+
+    @classmethod
+    def _sentiment_backends(cls) -> List[tuple]:
+        # Local CPU inference first when enabled; the HF Inference API stays as fallback
+        backends = []
+        if cls._local_sentiment is not None:
+            backends.append((f"LocalSentimentProvider:{cls._local_sentiment.model_id}", cls._local_sentiment,
+                             {"provider": "local", "model": cls._local_sentiment.model_id}))
+        backends.append(("HuggingFaceProvider:sst-2", cls._hf_provider, {"provider": "huggingface", "model": "distilbert-sst-2"}))
+        return backends
+
+    @classmethod
+    async def warmup(cls):
+        if cls._local_sentiment is not None:
+            try:
+                await cls._local_sentiment.warmup()
+            except Exception as e:
+                logger.error(f"Local sentiment backend unavailable, using HF Inference API: {str(e)}")
+                cls._local_sentiment = None
 
     @classmethod
     async def route_sentiment(cls, text: str) -> Dict[str, Any]:
-        return await cls._hf_provider.analyze_sentiment(text)
+        for key, backend, _ in cls._sentiment_backends():
+            breaker = CircuitBreaker.for_key(key)
+            if not breaker.allow():
+                continue
+            started = time.monotonic()
+            try:
+                async with AdmissionController.slot(key):
+                    started = time.monotonic()
+                    result = await backend.analyze_sentiment(text)
+            except AdmissionTimeout:
+                breaker.release()
+                continue
+            except Exception as e:
+                # Settle the probe and fall through to the next backend
+                breaker.record(False, time.monotonic() - started)
+                logger.warning(f"Sentiment backend {key} failed: {str(e)}")
+                continue
+            breaker.record("error" not in result, time.monotonic() - started)
+            if "error" not in result:
+                return result
+        return {"label": "neutral", "confidence": 0.0, "error": "Sentiment provider temporarily unavailable"}
+
+    @classmethod
+    async def route_sentiment_batch(cls, texts: List[str]) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """
+        Returns (results, metadata of the backend that produced them). When no
+        backend answers every text, the attempt with the fewest failed items is
+        kept, so callers can charge only for the items that succeeded.
+        """
+        best: Optional[Tuple[List[Dict[str, Any]], Dict[str, str]]] = None
+        for key, backend, metadata in cls._sentiment_backends():
+            breaker = CircuitBreaker.for_key(key)
+            if not breaker.allow():
+                continue
+            started = time.monotonic()
+            try:
+                async with AdmissionController.slot(key):
+                    started = time.monotonic()
+                    results = await backend.analyze_batch(texts)
+            except AdmissionTimeout:
+                breaker.release()
+                continue
+            except Exception as e:
+                # Settle the probe and fall through to the next backend
+                breaker.record(False, time.monotonic() - started)
+                logger.warning(f"Batch sentiment backend {key} failed: {str(e)}")
+                continue
+            failed = sum(1 for r in results if "error" in r)
+            breaker.record(failed == 0, time.monotonic() - started)
+            if failed == 0:
+                return results, metadata
+            if best is None or failed < sum(1 for r in best[0] if "error" in r):
+                best = (results, metadata)
+        if best is not None:
+            return best
+        return [{"label": "neutral", "confidence": 0.0, "error": "Sentiment provider temporarily unavailable"} for _ in texts], {}
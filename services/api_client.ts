@@ -153,16 +153,21 @@ export const BrandCraftAPI = {
   },
 
   async createContext(data: any) {
+    let res: Response;
     try {
-      const res = await fetchWithTimeout(getFullUrl('/context/create'), {
+      res = await fetchWithTimeout(getFullUrl('/context/create'), {
         method: 'POST',
         headers: getAuthHeaders(),
         body: JSON.stringify(data)
       });
-      return res.json();
     } catch (e) {
       return { context_id: "sim_ctx_" + Date.now() };
     }
+    // /context requires a signed-in user; surface that instead of saving a context without an id
+    if (!res.ok) {
+      throw new Error(res.status === 401 ? "Sign in to save your brand context." : `Context sync failed (${res.status})`);
+    }
+    return res.json();
   },
 
   async generateNames(payload: any) {
@@ -0,0 +1,122 @@
+
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+import logging
+import threading
+import time
+from core.config import settings
+
+logger = logging.getLogger("brandcraft.breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Per-provider breaker over a rolling time window of call outcomes.
+
+    Opens when the error rate crosses the threshold (after a minimum number of
+    calls), rejects calls until the cooldown elapses, then lets a limited number
+    of probes through in half-open state: a successful probe closes it again,
+    a failed one re-opens it.
+    """
+    _registry: Dict[str, "CircuitBreaker"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.half_open_in_flight = 0
+        self.rejected = 0
+        self._calls: Deque[Tuple[float, bool, float]] = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_key(cls, name: str) -> "CircuitBreaker":
+        with cls._registry_lock:
+            breaker = cls._registry.get(name)
+            if breaker is None:
+                breaker = cls._registry[name] = cls(name)
+            return breaker
+
+    def _trim(self, now: float):
+        cutoff = now - settings.BREAKER_WINDOW_SECONDS
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    def allow(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now - self.opened_at < settings.BREAKER_COOLDOWN_SECONDS:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self.half_open_in_flight = 0
+                logger.info(f"Circuit {self.name} half-open, probing")
+            if self.state == HALF_OPEN:
+                if self.half_open_in_flight >= settings.BREAKER_HALF_OPEN_PROBES:
+                    self.rejected += 1
+                    return False
+                self.half_open_in_flight += 1
+            return True
+
+    def record(self, success: bool, latency: float = 0.0):
+        with self._lock:
+            now = time.monotonic()
+            self._calls.append((now, success, latency))
+            self._trim(now)
+
+            if self.state == HALF_OPEN:
+                self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+                if success:
+                    self.state = CLOSED
+                    self._calls.clear()
+                    logger.info(f"Circuit {self.name} closed")
+                else:
+                    self._open(now)
+                return
+
+            if self.state == CLOSED and len(self._calls) >= settings.BREAKER_MIN_CALLS:
+                if self._error_rate() >= settings.BREAKER_ERROR_THRESHOLD:
+                    self._open(now)
+
+    def release(self):
+        """Frees a half-open probe slot for a call that was cancelled before finishing."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.half_open_in_flight = max(0, self.half_open_in_flight - 1)
+
+    def _open(self, now: float):
+        self.state = OPEN
+        self.opened_at = now
+        logger.warning(f"Circuit {self.name} opened (error rate {self._error_rate():.0%})")
+
+    def _error_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for _, ok, _ in self._calls if not ok) / len(self._calls)
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            self._trim(time.monotonic())
+            error_rate = self._error_rate()
+            latencies = sorted(lat for _, ok, lat in self._calls if ok)
+            p95 = latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+            # 1.0 is healthy; errors dominate, slow responses shave off up to half
+            slowness = min(1.0, p95 / settings.BREAKER_SLOW_CALL_SECONDS) if settings.BREAKER_SLOW_CALL_SECONDS else 0.0
+            score = 0.0 if self.state == OPEN else (1.0 - error_rate) * (1.0 - 0.5 * slowness)
+            return {
+                "state": self.state,
+                "score": round(score, 3),
+                "error_rate": round(error_rate, 3),
+                "p95_latency_s": round(p95, 3),
+                "calls_in_window": len(self._calls),
+                "rejected": self.rejected
+            }
+
+    @classmethod
+    def all_health(cls) -> Dict[str, Dict[str, Any]]:
+        return {name: b.health() for name, b in list(cls._registry.items())}
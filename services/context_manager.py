@@ -1,31 +1,133 @@
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.branding import ContextInput
+from database.models import BrandContextModel
+from core.config import settings
+import datetime
+import logging
+import threading
+import time
 import uuid
 
+logger = logging.getLogger("brandcraft.context")
+
+def _to_input(row: BrandContextModel) -> ContextInput:
+    return ContextInput(
+        industry=row.industry,
+        tone=row.tone,
+        keywords=row.keywords or [],
+        target_audience=row.target_audience,
+        brand_personality=row.brand_personality
+    )
+
 class ContextManager:
-    # Simulated in-memory database
-    _store: Dict[str, ContextInput] = {}
+    """
+    Brand contexts live in the brand_contexts table, so every worker sees the
+    same set and they survive restarts. A per-worker LRU/TTL cache sits in
+    front of the table; writes go to the table first, then the cache.
+    Entries remember their owner so lookups never leak another user's context.
+
+    Updates and deletes on one worker cannot reach the others' caches, so a hit
+    is revalidated with a one-column primary-key read of `updated_at`: a
+    deleted or changed context is never served. A hit still skips building the
+    ContextInput, and keeps the prompt block cached on it.
+    """
+    _cache: "OrderedDict[str, Tuple[float, str, ContextInput, Any]]" = OrderedDict()
+    _lock = threading.Lock()
+    stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "stale": 0}
+
+    @classmethod
+    def _cache_get(cls, ctx_id: str) -> Optional[Tuple[str, ContextInput, Any]]:
+        with cls._lock:
+            entry = cls._cache.get(ctx_id)
+            if entry is None:
+                cls.stats["misses"] += 1
+                return None
+            if entry[0] < time.monotonic():
+                del cls._cache[ctx_id]
+                cls.stats["expirations"] += 1
+                cls.stats["misses"] += 1
+                return None
+            cls._cache.move_to_end(ctx_id)
+            return entry[1], entry[2], entry[3]
+
+    @classmethod
+    def _cache_put(cls, ctx_id: str, owner_id: str, data: ContextInput, updated_at: Any = None):
+        if settings.CONTEXT_CACHE_TTL <= 0:
+            return
+        with cls._lock:
+            cls._cache[ctx_id] = (time.monotonic() + settings.CONTEXT_CACHE_TTL, owner_id, data, updated_at)
+            cls._cache.move_to_end(ctx_id)
+            while len(cls._cache) > settings.CONTEXT_CACHE_MAX_ENTRIES:
+                cls._cache.popitem(last=False)
+                cls.stats["evictions"] += 1
+
+    @classmethod
+    def _cache_drop(cls, ctx_id: str):
+        with cls._lock:
+            cls._cache.pop(ctx_id, None)
 
     @classmethod
-    def create_context(cls, data: ContextInput) -> str:
+    async def create_context(cls, db: AsyncSession, user_id: str, data: ContextInput) -> str:
         ctx_id = str(uuid.uuid4())
-        cls._store[ctx_id] = data
+        updated_at = datetime.datetime.utcnow()
+        db.add(BrandContextModel(id=ctx_id, user_id=user_id, updated_at=updated_at, **data.model_dump()))
+        await db.commit()
+        cls._cache_put(ctx_id, user_id, data, updated_at)
         return ctx_id
 
     @classmethod
-    def get_context(cls, ctx_id: str) -> Optional[ContextInput]:
-        return cls._store.get(ctx_id)
+    async def get_context(cls, db: AsyncSession, ctx_id: str, user_id: str) -> Optional[ContextInput]:
+        cached = cls._cache_get(ctx_id)
+        if cached is not None:
+            owner_id, data, updated_at = cached
+            if owner_id != user_id:
+                return None
+            current = (await db.execute(
+                select(BrandContextModel.updated_at).where(BrandContextModel.id == ctx_id)
+            )).one_or_none()
+            if current is not None and current[0] == updated_at:
+                cls.stats["hits"] += 1
+                return data
+            # Changed or deleted through another worker
+            cls.stats["stale"] += 1
+            cls._cache_drop(ctx_id)
+            if current is None:
+                return None
+
+        row = (await db.execute(select(BrandContextModel).where(BrandContextModel.id == ctx_id))).scalar_one_or_none()
+        if row is None:
+            return None
+        data = _to_input(row)
+        cls._cache_put(ctx_id, row.user_id, data, row.updated_at)
+        return data if row.user_id == user_id else None
+
+    @classmethod
+    async def update_context(cls, db: AsyncSession, ctx_id: str, user_id: str, data: ContextInput) -> bool:
+        row = (await db.execute(
+            select(BrandContextModel).where(BrandContextModel.id == ctx_id, BrandContextModel.user_id == user_id)
+        )).scalar_one_or_none()
+        if row is None:
+            return False
+        for field, value in data.model_dump().items():
+            setattr(row, field, value)
+        row.updated_at = datetime.datetime.utcnow()
+        await db.commit()
+        cls._cache_put(ctx_id, user_id, data, row.updated_at)
+        return True
 
     @classmethod
-    def update_context(cls, ctx_id: str, data: ContextInput) -> bool:
-        if ctx_id in cls._store:
-            cls._store[ctx_id] = data
-            return True
-        return False
+    async def delete_context(cls, db: AsyncSession, ctx_id: str, user_id: str) -> bool:
+        result = await db.execute(
+            delete(BrandContextModel).where(BrandContextModel.id == ctx_id, BrandContextModel.user_id == user_id)
+        )
+        await db.commit()
+        cls._cache_drop(ctx_id)
+        return result.rowcount > 0
 
     @classmethod
-    def delete_context(cls, ctx_id: str) -> bool:
-        if ctx_id in cls._store:
-            del cls._store[ctx_id]
-            return True
-        return False
\ No newline at end of file
+    def cache_stats(cls) -> Dict[str, int]:
+        with cls._lock:
+            return {**cls.stats, "size": len(cls._cache)}
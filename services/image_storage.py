@@ -0,0 +1,242 @@
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional, Tuple
+import asyncio
+import binascii
+import fcntl
+import hashlib
+import logging
+import os
+import time
+import uuid
+from core.config import settings
+
+logger = logging.getLogger("brandcraft.storage")
+
+# Base64 characters per decode step (a multiple of 4). a2b_base64 holds the GIL,
+# so decoding a whole 1024x1024 PNG in one call stalls the event loop for ~10ms;
+# in slices the worker thread yields the GIL between steps.
+_B64_CHUNK = 64 * 1024
+
+def _decode_base64(encoded: str) -> Tuple[bytes, str]:
+    """Decoded bytes and their SHA-256, computed slice by slice."""
+    if "\n" in encoded or " " in encoded:
+        # Slices must stay 4-aligned, so drop any line wrapping first
+        encoded = "".join(encoded.split())
+    digest = hashlib.sha256()
+    parts = []
+    for start in range(0, len(encoded), _B64_CHUNK):
+        part = binascii.a2b_base64(encoded[start:start + _B64_CHUNK])
+        digest.update(part)
+        parts.append(part)
+    return b"".join(parts), digest.hexdigest()
+
+class StoredObject:
+    __slots__ = ("key", "size", "modified")
+
+    def __init__(self, key: str, size: int, modified: float):
+        self.key = key
+        self.size = size
+        self.modified = modified
+
+class ObjectStore(ABC):
+    """
+    Whole-object storage addressed by flat '/'-separated keys, shaped like an
+    object store (S3, GCS) so a bucket-backed store can replace the local one.
+    Methods are blocking; ImageStorage calls them off the event loop.
+    """
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, content_type: str) -> bool:
+        """Stores the object; returns False if the key already existed (its timestamp is refreshed instead)."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str, modified: Optional[float] = None) -> bool:
+        """
+        Removes the object. With `modified` (its listed timestamp) the delete is
+        skipped if the object was refreshed since; returns whether it was removed.
+        """
+        pass
+
+    @abstractmethod
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        pass
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        pass
+
+class LocalObjectStore(ObjectStore):
+    """Objects as files under `root` (the /static mount); writes are atomic via rename."""
+
+    def __init__(self, root: str, url_prefix: str = "/static"):
+        self.root = root
+        self.url_prefix = url_prefix.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key: str, data: bytes, content_type: str) -> bool:
+        path = self._path(key)
+        try:
+            os.utime(path)
+            return False
+        except FileNotFoundError:
+            pass  # new, or swept just now: write it (again)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(data)
+            # Identical concurrent writes both land the same bytes, so last rename wins harmlessly
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        return True
+
+    def delete(self, key: str, modified: Optional[float] = None) -> bool:
+        path = self._path(key)
+        try:
+            if modified is not None and os.stat(path).st_mtime != modified:
+                return False  # regenerated since it was listed
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def list(self, prefix: str) -> Iterator[StoredObject]:
+        for directory, _, files in os.walk(self._path(prefix)):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                yield StoredObject(key, st.st_size, st.st_mtime)
+
+    def url(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+class ImageStorage:
+    """
+    Content-addressed storage for generated images: the key is the SHA-256 of
+    the decoded bytes, so identical outputs are stored once. Decoding, hashing
+    and writing run in a worker thread, never on the event loop. A background
+    sweep enforces IMAGE_RETENTION_DAYS (since an image was last generated)
+    and the IMAGE_STORE_MAX_BYTES cap, oldest first; only the worker holding
+    IMAGE_CLEANUP_LOCK_FILE runs it.
+    """
+    _store: Optional[ObjectStore] = None
+    _task: Optional[asyncio.Task] = None
+    _lock_handle = None
+    stats: Dict[str, int] = {"stored": 0, "deduplicated": 0, "bytes_written": 0, "deleted": 0, "bytes_deleted": 0, "cleanups": 0}
+
+    @classmethod
+    def store(cls) -> ObjectStore:
+        if cls._store is None:
+            cls._store = LocalObjectStore(settings.STATIC_DIR)
+        return cls._store
+
+    @classmethod
+    def set_store(cls, store: ObjectStore):
+        cls._store = store
+
+    @classmethod
+    def _put_base64(cls, encoded: str, ext: str) -> Tuple[str, bool, int]:
+        data, digest = _decode_base64(encoded)
+        key = f"{settings.IMAGE_STORE_PREFIX}/{digest[:2]}/{digest}.{ext}"
+        store = cls.store()
+        return store.url(key), store.put(key, data, f"image/{ext}"), len(data)
+
+    @classmethod
+    async def save_base64(cls, encoded: str, ext: str = "png") -> str:
+        """Stores a base64-encoded image and returns its public URL."""
+        url, created, size = await asyncio.to_thread(cls._put_base64, encoded, ext)
+        if created:
+            cls.stats["stored"] += 1
+            cls.stats["bytes_written"] += size
+        else:
+            cls.stats["deduplicated"] += 1
+        return url
+
+    @classmethod
+    def cleanup(cls, now: Optional[float] = None) -> Dict[str, int]:
+        """Blocking retention sweep; returns what was removed."""
+        now = now or time.time()
+        store = cls.store()
+        objects = sorted(store.list(settings.IMAGE_STORE_PREFIX), key=lambda o: o.modified)
+        cutoff = now - settings.IMAGE_RETENTION_DAYS * 86400 if settings.IMAGE_RETENTION_DAYS > 0 else None
+        total = sum(o.size for o in objects)
+        deleted = freed = 0
+        for obj in objects:
+            expired = cutoff is not None and obj.modified < cutoff
+            over_cap = 0 < settings.IMAGE_STORE_MAX_BYTES < total
+            if not (expired or over_cap):
+                break
+            if not store.delete(obj.key, obj.modified):
+                continue
+            total -= obj.size
+            deleted += 1
+            freed += obj.size
+        cls.stats["deleted"] += deleted
+        cls.stats["bytes_deleted"] += freed
+        cls.stats["cleanups"] += 1
+        if deleted:
+            logger.info(f"Image retention: removed {deleted} images ({freed} bytes), {total} bytes kept")
+        return {"deleted": deleted, "bytes_freed": freed, "bytes_kept": total}
+
+    @classmethod
+    def _acquire_sweep_lock(cls) -> bool:
+        """Held for the life of the process, so a new sweeper takes over only if the holder exits."""
+        if cls._lock_handle is not None:
+            return True
+        os.makedirs(os.path.dirname(settings.IMAGE_CLEANUP_LOCK_FILE) or ".", exist_ok=True)
+        handle = open(settings.IMAGE_CLEANUP_LOCK_FILE, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            return False
+        cls._lock_handle = handle
+        logger.info(f"Image retention sweep owned by pid {os.getpid()}")
+        return True
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            try:
+                if cls._acquire_sweep_lock():
+                    await asyncio.to_thread(cls.cleanup)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Image retention sweep failed: {str(e)}")
+            await asyncio.sleep(settings.IMAGE_CLEANUP_INTERVAL)
+
+    @classmethod
+    async def start(cls):
+        if cls._task is not None or settings.IMAGE_CLEANUP_INTERVAL <= 0:
+            return
+        cls._task = asyncio.create_task(cls._run())
+        logger.info(f"Image retention sweep every {settings.IMAGE_CLEANUP_INTERVAL}s (retention {settings.IMAGE_RETENTION_DAYS}d, cap {settings.IMAGE_STORE_MAX_BYTES} bytes)")
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        await asyncio.gather(cls._task, return_exceptions=True)
+        cls._task = None
+        if cls._lock_handle is not None:
+            cls._lock_handle.close()  # releases the flock
+            cls._lock_handle = None
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        return dict(cls.stats)
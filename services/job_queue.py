@@ -0,0 +1,278 @@
+
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit
+import asyncio
+import enum
+import ipaddress
+import logging
+import socket
+import time
+import uuid
+from sqlalchemy import delete, select, update
+from core.config import settings
+from database import connection
+from database.models import JobRecord
+from services.providers.http_session import HTTPSessionPool
+
+logger = logging.getLogger("brandcraft.jobs")
+
+async def check_callback_url(url: str):
+    """
+    Raises ValueError unless `url` is http(s) and its host resolves only to
+    public addresses (and is allow-listed, when JOB_CALLBACK_ALLOWED_HOSTS is
+    set). Keeps webhooks from reaching loopback, private networks, cloud
+    metadata endpoints or this service itself.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("Callback URL must be an absolute http(s) URL")
+    host = parts.hostname.lower()
+    allowed = {h.strip().lower() for h in settings.JOB_CALLBACK_ALLOWED_HOSTS.split(",") if h.strip()}
+    if allowed and host not in allowed:
+        raise ValueError("Callback host is not allowed")
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, parts.port or (443 if parts.scheme == "https" else 80), type=socket.SOCK_STREAM)
+    except socket.gaierror:
+        raise ValueError("Callback host does not resolve")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        if getattr(address, "ipv4_mapped", None):
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError("Callback host resolves to a non-public address")
+
+class JobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class Job:
+    def __init__(self, kind: str, payload: Dict[str, Any], owner_id: str, callback_url: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.owner_id = owner_id
+        self.callback_url = callback_url
+        self.status = JobStatus.PENDING
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @classmethod
+    def from_record(cls, record: JobRecord) -> "Job":
+        job = cls(record.kind, record.payload or {}, record.owner_id, record.callback_url)
+        job.id = record.id
+        job.status = JobStatus(record.status)
+        job.result = record.result
+        job.error = record.error
+        job.created_at = record.created_at
+        job.started_at = record.started_at
+        job.finished_at = record.finished_at
+        return job
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status.value,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+JobHandler = Callable[[Job], Awaitable[Dict[str, Any]]]
+
+class JobQueueBackend(ABC):
+    """Interface a Celery/Redis-backed queue can implement later."""
+
+    @abstractmethod
+    async def start(self):
+        pass
+
+    @abstractmethod
+    async def stop(self):
+        pass
+
+    @abstractmethod
+    async def submit(self, job: Job) -> Job:
+        pass
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[Job]:
+        pass
+
+    @abstractmethod
+    async def update(self, job: Job):
+        """Publishes a job's status, result and timestamps."""
+        pass
+
+class InProcessJobQueue(JobQueueBackend):
+    """
+    Runs jobs on the worker that accepted them, but keeps job state in the
+    `jobs` table so GET /branding/jobs/{id} answers on every worker.
+    """
+
+    def __init__(self, workers: int, max_pending: int, result_ttl: float, shutdown_grace: float = 0):
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.shutdown_grace = shutdown_grace
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._tasks = []
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        if self._tasks and self.shutdown_grace > 0:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=self.shutdown_grace)
+            except asyncio.TimeoutError:
+                logger.warning(f"Job queue not drained within {self.shutdown_grace}s, failing the rest")
+        # Running jobs fail themselves on cancel (see JobQueue.execute)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        while not self._queue.empty():
+            await JobQueue.abandon(self._queue.get_nowait(), "Job was not started before the server shut down.")
+
+    async def submit(self, job: Job) -> Job:
+        if self._queue.full():
+            raise asyncio.QueueFull
+        async with connection.AsyncSessionLocal() as db:
+            await db.execute(delete(JobRecord).where(JobRecord.finished_at < time.time() - self.result_ttl))
+            db.add(JobRecord(
+                id=job.id, kind=job.kind, owner_id=job.owner_id, status=job.status.value,
+                payload=job.payload, callback_url=job.callback_url, created_at=job.created_at
+            ))
+            await db.commit()
+        self._queue.put_nowait(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        async with connection.AsyncSessionLocal() as db:
+            record = (await db.execute(select(JobRecord).where(JobRecord.id == job_id))).scalar_one_or_none()
+        return Job.from_record(record) if record else None
+
+    async def update(self, job: Job):
+        async with connection.AsyncSessionLocal() as db:
+            await db.execute(update(JobRecord).where(JobRecord.id == job.id).values(
+                status=job.status.value, result=job.result, error=job.error,
+                started_at=job.started_at, finished_at=job.finished_at
+            ))
+            await db.commit()
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await JobQueue.execute(job)
+            finally:
+                self._queue.task_done()
+
+class JobQueue:
+    _backend: Optional[JobQueueBackend] = None
+    _handlers: Dict[str, JobHandler] = {}
+    _completion_hooks: Dict[str, Callable[[Job], Awaitable[None]]] = {}
+
+    @classmethod
+    def backend(cls) -> JobQueueBackend:
+        if cls._backend is None:
+            cls._backend = InProcessJobQueue(
+                settings.JOB_WORKERS, settings.JOB_QUEUE_MAX, settings.JOB_RESULT_TTL, settings.JOB_SHUTDOWN_GRACE
+            )
+        return cls._backend
+
+    @classmethod
+    def register(cls, kind: str, handler: JobHandler, on_complete: Optional[Callable[[Job], Awaitable[None]]] = None):
+        cls._handlers[kind] = handler
+        if on_complete:
+            cls._completion_hooks[kind] = on_complete
+
+    @classmethod
+    async def startup(cls):
+        await cls.backend().start()
+
+    @classmethod
+    async def shutdown(cls):
+        if cls._backend is not None:
+            await cls._backend.stop()
+
+    @classmethod
+    async def submit(cls, kind: str, payload: Dict[str, Any], owner_id: str, callback_url: Optional[str] = None) -> Job:
+        if kind not in cls._handlers:
+            raise ValueError(f"No handler registered for job kind '{kind}'")
+        backend = cls.backend()
+        await backend.start()
+        return await backend.submit(Job(kind, payload, owner_id, callback_url))
+
+    @classmethod
+    async def get(cls, job_id: str) -> Optional[Job]:
+        return await cls.backend().get(job_id)
+
+    @classmethod
+    async def _publish(cls, job: Job):
+        try:
+            await cls.backend().update(job)
+        except Exception as e:
+            logger.error(f"Job {job.id} state update failed: {str(e)}")
+
+    @classmethod
+    async def execute(cls, job: Job):
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        await cls._publish(job)
+        try:
+            job.result = await cls._handlers[job.kind](job)
+            job.status = JobStatus.COMPLETED
+        except asyncio.CancelledError:
+            # Shutdown: record the failure and run the hook (refunds) before unwinding
+            await asyncio.shield(cls.abandon(job, "Job was interrupted by a server shutdown."))
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            job.error = str(e)
+            job.status = JobStatus.FAILED
+        await cls._settle(job)
+
+        if job.callback_url:
+            await cls._notify(job)
+
+    @classmethod
+    async def abandon(cls, job: Job, reason: str):
+        """Fails a job that will not run (or finish) and settles it like any other failure."""
+        job.status = JobStatus.FAILED
+        job.error = reason
+        await cls._settle(job)
+
+    @classmethod
+    async def _settle(cls, job: Job):
+        job.finished_at = time.time()
+        await cls._publish(job)
+        hook = cls._completion_hooks.get(job.kind)
+        if hook:
+            try:
+                await hook(job)
+            except Exception as e:
+                logger.error(f"Job {job.id} completion hook failed: {str(e)}")
+
+    @staticmethod
+    async def _notify(job: Job):
+        try:
+            # Re-checked at delivery: DNS may have changed since the job was submitted
+            await check_callback_url(job.callback_url)
+            session = await HTTPSessionPool.get_session()
+            async with session.post(job.callback_url, json=job.to_dict(), timeout=10, allow_redirects=False) as response:
+                if response.status >= 400:
+                    logger.warning(f"Job {job.id} webhook returned {response.status}")
+        except Exception as e:
+            logger.warning(f"Job {job.id} webhook delivery failed: {str(e)}")
@@ -8,18 +8,27 @@ class MetricsEngine:
     @staticmethod
     def get_global_metrics(db: Session):
         total_users = db.query(models.User).count()
-        active_24h = db.query(models.UsageLog.user_id).filter(
-            models.UsageLog.timestamp >= datetime.datetime.utcnow() - datetime.timedelta(days=1)
+        rollup = models.UsageRollup
+        # Hourly buckets: "active in the last 24h" is resolved to the hour
+        active_24h = db.query(rollup.user_id).filter(
+            rollup.granularity == "hour",
+            rollup.bucket_start >= (datetime.datetime.utcnow() - datetime.timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
         ).distinct().count()
         
-        total_requests = db.query(models.UsageLog).count()
-        avg_latency = db.query(func.avg(models.UsageLog.duration)).scalar() or 0
+        totals = db.query(
+            func.sum(rollup.requests),
+            func.sum(rollup.duration_sum),
+            func.sum(rollup.credits_consumed),
+            func.sum(rollup.errors)
+        ).filter(rollup.granularity == "day").one()
+        total_requests = totals[0] or 0
+        avg_latency = (totals[1] or 0) / total_requests if total_requests else 0
         
         # Revenue estimate based on credits (hypothetical $0.10 per credit)
-        total_credits_consumed = db.query(func.sum(models.UsageLog.credits_consumed)).scalar() or 0
+        total_credits_consumed = totals[2] or 0
         revenue_est = total_credits_consumed * 0.10
         
-        error_count = db.query(models.UsageLog).filter(models.UsageLog.status_code >= 400).count()
+        error_count = totals[3] or 0
         error_percentage = (error_count / total_requests * 100) if total_requests > 0 else 0
 
         return {
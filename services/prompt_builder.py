@@ -1,33 +1,142 @@
+from string import Formatter
+from typing import Dict, List, Optional
 from schemas.branding import ContextInput, NameRequest
+import hashlib
+import re
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+class PromptTemplate:
+    """A task prompt declared once; placeholders are checked at import time, not per request."""
+
+    __slots__ = ("name", "body", "fields", "digest")
+
+    def __init__(self, name: str, body: str):
+        self.name = name
+        self.body = body
+        self.fields = frozenset(field for _, field, _, _ in Formatter().parse(body) if field)
+        # Part of every fingerprint, so editing a template retires its cached responses
+        self.digest = _digest(name, body)[:16]
+
+    def render(self, values: Dict[str, str]) -> str:
+        return self.body.format_map(values) if self.fields else self.body
+
+class ContextBlock:
+    """The rendered BRAND CONTEXT prefix of a context, plus the values task templates draw on."""
+
+    __slots__ = ("text", "digest", "values")
+
+    def __init__(self, context: ContextInput):
+        self.values = {
+            "industry": context.industry,
+            "tone": context.tone,
+            "audience": context.target_audience,
+            "personality": context.brand_personality,
+            "keywords": ", ".join(context.keywords),
+        }
+        self.text = (
+            "BRAND CONTEXT:\n"
+            "- Industry: {industry}\n"
+            "- Tone: {tone}\n"
+            "- Audience: {audience}\n"
+            "- Personality: {personality}\n"
+            "- Keywords: {keywords}\n\n"
+        ).format_map(self.values)
+        self.digest = _digest(self.text)[:16]
+
+class RenderedPrompt:
+    """
+    Prompt text plus a stable fingerprint (template, context prefix and task
+    text). `prefix_key` identifies the shared context prefix so providers that
+    support prompt-prefix caching can route repeat prefixes together.
+    """
+
+    __slots__ = ("text", "template", "body", "block", "prefix_key", "fingerprint")
+
+    def __init__(self, template: PromptTemplate, block: Optional[ContextBlock], body: str):
+        self.text = block.text + body if block else body
+        self.template = template.name
+        self.body = body
+        self.block = block
+        self.prefix_key = block.digest if block else None
+        self.fingerprint = _digest(template.digest, self.prefix_key or "", body)
+
+    def __str__(self) -> str:
+        return self.text
+
+TEMPLATES: Dict[str, PromptTemplate] = {t.name: t for t in [
+    PromptTemplate("brand_names", "Generate 5 unique brand names. Focus on the {vibe} vibe."),
+    PromptTemplate("logo", "Create a professional logo: {prompt}. Style should be {personality}."),
+    PromptTemplate("content_tagline", "Craft 3 punchy taglines."),
+    PromptTemplate("content_mission", "Write a 2-sentence mission statement."),
+    PromptTemplate("content_social", "Draft 2 engaging Instagram captions."),
+    PromptTemplate("content_generic", "Create {type} content."),
+    PromptTemplate("roadmap", "Create a 7-day marketing roadmap for {industry} in JSON format."),
+    PromptTemplate("research", "Research market trends for {industry}."),
+    PromptTemplate(
+        "packed",
+        "Complete each numbered task below independently. Start every answer with its marker line "
+        "exactly as given (### 1, ### 2, ...) and write nothing before the first marker.\n\n{tasks}"
+    ),
+]}
+
+_PACK_MARKER = re.compile(r"^[ \t]*#{2,3}[ \t]*(\d+)[ \t]*$", re.MULTILINE)
 
 class PromptBuilder:
     @staticmethod
-    def _inject_context(base_prompt: str, context: ContextInput) -> str:
-        ctx_str = (
-            f"BRAND CONTEXT:\n"
-            f"- Industry: {context.industry}\n"
-            f"- Tone: {context.tone}\n"
-            f"- Audience: {context.target_audience}\n"
-            f"- Personality: {context.brand_personality}\n"
-            f"- Keywords: {', '.join(context.keywords)}\n\n"
-        )
-        return ctx_str + base_prompt
+    def context_block(context: ContextInput) -> ContextBlock:
+        # Stored on the context itself: ContextManager hands out the same cached
+        # instance per context, and an update replaces it, so the block never goes stale
+        block = context._prompt_block
+        if block is None:
+            block = context._prompt_block = ContextBlock(context)
+        return block
 
     @classmethod
-    def build_brand_name_prompt(cls, req: NameRequest, context: ContextInput) -> str:
-        base = f"Generate 5 unique brand names. Focus on the {req.vibe or context.tone} vibe."
-        return cls._inject_context(base, context)
+    def render(cls, template_name: str, context: Optional[ContextInput] = None, **values: str) -> RenderedPrompt:
+        template = TEMPLATES[template_name]
+        block = cls.context_block(context) if context is not None else None
+        body = template.render({**block.values, **values} if block else values)
+        return RenderedPrompt(template, block, body)
+
+    @staticmethod
+    def pack(prompts: List[RenderedPrompt]) -> RenderedPrompt:
+        """Several task prompts sharing one context prefix, as one numbered prompt; undo with unpack()."""
+        tasks = "\n\n".join(f"### {i}\n{prompt.body}" for i, prompt in enumerate(prompts, 1))
+        template = TEMPLATES["packed"]
+        return RenderedPrompt(template, prompts[0].block, template.render({"tasks": tasks}))
+
+    @staticmethod
+    def unpack(text: str, count: int) -> Optional[List[str]]:
+        """Splits a packed completion into `count` answers, or None if any answer is missing."""
+        markers = list(_PACK_MARKER.finditer(text or ""))
+        answers: Dict[int, str] = {}
+        for marker, following in zip(markers, markers[1:] + [None]):
+            answers[int(marker.group(1))] = text[marker.end():following.start() if following else len(text)].strip()
+        if not all(answers.get(i) for i in range(1, count + 1)):
+            return None
+        return [answers[i] for i in range(1, count + 1)]
 
     @classmethod
-    def build_logo_prompt(cls, prompt: str, context: ContextInput) -> str:
-        base = f"Create a professional logo: {prompt}. Style should be {context.brand_personality}."
-        return cls._inject_context(base, context)
+    def build_brand_name_prompt(cls, req: NameRequest, context: ContextInput) -> RenderedPrompt:
+        return cls.render("brand_names", context, vibe=req.vibe or context.tone)
 
     @classmethod
-    def build_content_prompt(cls, c_type: str, context: ContextInput) -> str:
-        prompts = {
-            "tagline": "Craft 3 punchy taglines.",
-            "mission": "Write a 2-sentence mission statement.",
-            "social": "Draft 2 engaging Instagram captions."
-        }
-        return cls._inject_context(prompts.get(c_type, ""), context)
\ No newline at end of file
+    def build_logo_prompt(cls, prompt: str, context: ContextInput) -> RenderedPrompt:
+        return cls.render("logo", context, prompt=prompt)
+
+    @classmethod
+    def build_content_prompt(cls, c_type: str, context: Optional[ContextInput]) -> RenderedPrompt:
+        if context is None:
+            return cls.render("content_generic", type=c_type)
+        name = f"content_{c_type}"
+        return cls.render(name if name in TEMPLATES else "content_generic", context, type=c_type)
+
+    @classmethod
+    def build_roadmap_prompt(cls, context: Optional[ContextInput]) -> RenderedPrompt:
+        return cls.render("roadmap", context) if context else cls.render("roadmap", industry="a new brand")
+
+    @classmethod
+    def build_research_prompt(cls, context: Optional[ContextInput]) -> RenderedPrompt:
+        return cls.render("research", context) if context else cls.render("research", industry="emerging markets")
@@ -0,0 +1,215 @@
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from core.config import settings
+
+logger = logging.getLogger("brandcraft.cache")
+
+class CacheBackend(ABC):
+    # Backends doing I/O set this so PromptCache calls them off the event loop
+    blocking = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-worker LRU with TTL, bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+class FileCacheBackend(CacheBackend):
+    """
+    Local stand-in for a shared store (e.g. Redis): entries are JSON files in a
+    directory visible to every worker on the host. Oldest files are evicted first.
+
+    The entry count is tracked rather than listed on every write: the directory
+    is only scanned once the count passes max_entries, and is then trimmed to
+    90% of it. Other workers' writes surface at the next scan, so the bound is
+    approximate.
+    """
+    blocking = True
+
+    def __init__(self, directory: str, max_entries: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._evict_lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._count = sum(1 for e in os.scandir(directory) if e.name.endswith(".json"))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) < time.time():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)  # refresh recency for LRU eviction
+        except OSError:
+            pass
+        return entry.get("value")
+
+    def set(self, key: str, value: Dict[str, Any], ttl: float):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        existed = os.path.exists(path)
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"expires_at": time.time() + ttl, "value": value}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError) as e:
+            logger.warning(f"Prompt cache write failed: {e}")
+            return
+        if not existed:
+            self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        if not self._evict_lock.acquire(blocking=False):
+            return  # another thread is already trimming
+        try:
+            try:
+                entries = [e for e in os.scandir(self.directory) if e.name.endswith(".json")]
+            except OSError:
+                return
+            self._count = len(entries)
+            overflow = len(entries) - int(self.max_entries * 0.9)
+            if overflow <= 0:
+                return
+            entries.sort(key=lambda e: e.stat().st_mtime)
+            for entry in entries[:overflow]:
+                try:
+                    os.remove(entry.path)
+                    self.evictions += 1
+                    self._count -= 1
+                except OSError:
+                    pass
+        finally:
+            self._evict_lock.release()
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+        self._count = 0
+
+class PromptCache:
+    """Exact-match cache for provider text responses."""
+    _backend: Optional[CacheBackend] = None
+    hits = 0
+    misses = 0
+
+    @classmethod
+    def backend(cls) -> CacheBackend:
+        if cls._backend is None:
+            if settings.PROMPT_CACHE_BACKEND == "file":
+                cls._backend = FileCacheBackend(settings.PROMPT_CACHE_DIR, settings.PROMPT_CACHE_MAX_ENTRIES)
+            else:
+                cls._backend = MemoryCacheBackend(settings.PROMPT_CACHE_MAX_ENTRIES)
+        return cls._backend
+
+    @classmethod
+    def set_backend(cls, backend: CacheBackend):
+        cls._backend = backend
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return re.sub(r"\s+", " ", prompt).strip()
+
+    @classmethod
+    def make_key(cls, task: str, provider_chain: str, prompt: str, fingerprint: Optional[str] = None) -> str:
+        """Templated prompts pass their fingerprint, which stands in for the normalized text."""
+        raw = "\x1f".join([task, provider_chain, fingerprint or cls.normalize(prompt)])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    @classmethod
+    async def get(cls, key: str) -> Optional[Dict[str, Any]]:
+        if not settings.PROMPT_CACHE_ENABLED:
+            return None
+        backend = cls.backend()
+        value = await asyncio.to_thread(backend.get, key) if backend.blocking else backend.get(key)
+        if value is None:
+            cls.misses += 1
+            return None
+        cls.hits += 1
+        return value
+
+    @classmethod
+    async def set(cls, key: str, value: Dict[str, Any]):
+        if not settings.PROMPT_CACHE_ENABLED:
+            return
+        backend = cls.backend()
+        if backend.blocking:
+            await asyncio.to_thread(backend.set, key, value, settings.PROMPT_CACHE_TTL)
+        else:
+            backend.set(key, value, settings.PROMPT_CACHE_TTL)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        total = cls.hits + cls.misses
+        return {
+            "hits": cls.hits,
+            "misses": cls.misses,
+            "evictions": getattr(cls._backend, "evictions", 0),
+            "hit_ratio": round(cls.hits / total, 4) if total else 0.0
+        }
@@ -1,6 +1,6 @@
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncIterator
 
 class AIProvider(ABC):
     @abstractmethod
@@ -19,3 +19,14 @@ class AIProvider(ABC):
         }
         """
         pass
+
+    async def stream_text(self, prompt: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields {"delta": str} chunks followed by one final event:
+        {"done": True, "provider": str, "model": str, "usage": {...}}
+
+        Providers without native streaming emit the full completion as a single delta.
+        """
+        result = await self.generate_text(prompt, **kwargs)
+        yield {"delta": result["text"]}
+        yield {"done": True, "provider": result["provider"], "model": result["model"], "usage": result["usage"]}
@@ -0,0 +1,90 @@
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+import asyncio
+import logging
+import threading
+import time
+
+logger = logging.getLogger("brandcraft.executor")
+
+class ProviderExecutor:
+    """
+    Dedicated, bounded thread pool for a blocking provider SDK.
+
+    Each provider gets its own pool so a burst against one vendor cannot starve
+    the others (or the loop's default executor). Calls carry a hard deadline;
+    on timeout the caller is released immediately while the worker thread
+    finishes in the background.
+    """
+    _registry: Dict[str, "ProviderExecutor"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, max_workers: int, timeout: float):
+        self.name = name
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"provider-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.total_queue_wait = 0.0
+
+    @classmethod
+    def for_provider(cls, name: str, max_workers: int, timeout: float) -> "ProviderExecutor":
+        with cls._registry_lock:
+            executor = cls._registry.get(name)
+            if executor is None:
+                executor = cls(name, max_workers, timeout)
+                cls._registry[name] = executor
+            return executor
+
+    def _wrap(self, fn: Callable[[], Any], submitted_at: float) -> Callable[[], Any]:
+        def runner():
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_queue_wait += time.monotonic() - submitted_at
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.completed += 1
+        return runner
+
+    async def run(self, fn: Callable[[], Any], timeout: float = None) -> Any:
+        with self._lock:
+            self.queued += 1
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, self._wrap(fn, time.monotonic()))
+        try:
+            return await asyncio.wait_for(future, timeout=timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            logger.warning(f"{self.name} call exceeded {timeout or self.timeout}s deadline")
+            raise
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "timeouts": self.timeouts,
+                "avg_queue_wait_ms": round(self.total_queue_wait / self.completed * 1000, 2) if self.completed else 0.0
+            }
+
+    @classmethod
+    def all_stats(cls) -> Dict[str, Dict[str, Any]]:
+        return {name: ex.stats() for name, ex in cls._registry.items()}
+
+    @classmethod
+    def shutdown_all(cls):
+        for ex in cls._registry.values():
+            ex._pool.shutdown(wait=False, cancel_futures=True)
+        cls._registry.clear()
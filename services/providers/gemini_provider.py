@@ -2,31 +2,61 @@
 import google.generativeai as genai
 from core.config import settings
 from services.providers.base import AIProvider
-from tenacity import retry, stop_after_attempt, wait_exponential
+from services.providers.executor import ProviderExecutor
+from tenacity import AsyncRetrying, retry_if_not_exception_type, stop_after_attempt, stop_after_delay, wait_exponential
+from typing import Any, AsyncIterator, Dict
 import asyncio
+import threading
 import logging
+import time
 
 logger = logging.getLogger("brandcraft.gemini")
 
 class GeminiProvider(AIProvider):
+    # GenerativeModel objects are stateless per call, so one per model name is shared
+    _models: Dict[str, genai.GenerativeModel] = {}
+    _models_lock = threading.Lock()
+
     def __init__(self, model_name: str = 'gemini-3-flash-preview'):
         genai.configure(api_key=settings.API_KEY)
         self.model_name = model_name
+        self.executor = ProviderExecutor.for_provider(
+            "gemini", settings.GEMINI_EXECUTOR_WORKERS, settings.GEMINI_CALL_TIMEOUT
+        )
+
+    @classmethod
+    def get_model(cls, model_name: str) -> genai.GenerativeModel:
+        model = cls._models.get(model_name)
+        if model is None:
+            with cls._models_lock:
+                model = cls._models.get(model_name)
+                if model is None:
+                    model = genai.GenerativeModel(model_name)
+                    cls._models[model_name] = model
+        return model
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
     async def generate_text(self, prompt: str, **kwargs) -> dict:
+        # GEMINI_CALL_TIMEOUT bounds the whole call, retries and backoff included:
+        # each attempt gets what is left, and a timed-out attempt is not retried
+        deadline = time.monotonic() + self.executor.timeout
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3) | stop_after_delay(self.executor.timeout),
+            wait=wait_exponential(multiplier=1, min=2, max=10),
+            retry=retry_if_not_exception_type(asyncio.TimeoutError),
+            reraise=True
+        ):
+            with attempt:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError(f"Gemini call exceeded {self.executor.timeout}s deadline")
+                return await self._generate_once(prompt, remaining)
+
+    async def _generate_once(self, prompt: str, timeout: float) -> dict:
         try:
-            loop = asyncio.get_event_loop()
-            model = genai.GenerativeModel(self.model_name)
+            model = self.get_model(self.model_name)
             
-            # Use synchronous call in executor as SDK is primarily blocking
-            response = await loop.run_in_executor(
-                None, 
-                lambda: model.generate_content(prompt)
-            )
+            # SDK is primarily blocking; run it on the dedicated Gemini pool
+            response = await self.executor.run(lambda: model.generate_content(prompt), timeout=timeout)
             
             if not response.text:
                 raise ValueError("Empty response from Gemini")
@@ -48,3 +78,59 @@ class GeminiProvider(AIProvider):
         except Exception as e:
             logger.error(f"Gemini API Error: {str(e)}")
             raise e
+
+    async def stream_text(self, prompt: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        model = self.get_model(self.model_name)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        def pump():
+            # Iterating the SDK stream blocks, so drain it on the Gemini pool
+            usage = None
+            try:
+                for chunk in model.generate_content(prompt, stream=True):
+                    usage = getattr(chunk, 'usage_metadata', None) or usage
+                    text = getattr(chunk, 'text', '')
+                    if text:
+                        loop.call_soon_threadsafe(queue.put_nowait, {"delta": text})
+                return usage
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        task = asyncio.ensure_future(self.executor.run(pump))
+        try:
+            while True:
+                if task.done():
+                    if queue.empty():
+                        task.result()  # surfaces the executor deadline error
+                        break
+                    item = queue.get_nowait()
+                else:
+                    getter = asyncio.ensure_future(queue.get())
+                    await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                    if not getter.done():
+                        getter.cancel()
+                        continue
+                    item = getter.result()
+                if item is done:
+                    break
+                yield item
+            usage = await task
+        except Exception as e:
+            logger.error(f"Gemini Stream Error: {str(e)}")
+            raise
+        finally:
+            if not task.done():
+                task.cancel()
+
+        yield {
+            "done": True,
+            "provider": "google",
+            "model": self.model_name,
+            "usage": {
+                "prompt_tokens": getattr(usage, 'prompt_token_count', 0),
+                "completion_tokens": getattr(usage, 'candidates_token_count', 0),
+                "total_tokens": getattr(usage, 'total_token_count', 0)
+            }
+        }
@@ -0,0 +1,51 @@
+
+import asyncio
+import logging
+from typing import Optional
+import aiohttp
+from core.config import settings
+
+logger = logging.getLogger("brandcraft.http")
+
+class HTTPSessionPool:
+    """Single long-lived aiohttp session shared by all HTTP-based providers in a worker."""
+    _session: Optional[aiohttp.ClientSession] = None
+    _lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def _build_session(cls) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=settings.HTTP_POOL_LIMIT,
+            limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+            keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+            use_dns_cache=True,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    @classmethod
+    async def startup(cls):
+        if cls._session is None or cls._session.closed:
+            cls._session = cls._build_session()
+            logger.info(
+                f"HTTP pool started (limit={settings.HTTP_POOL_LIMIT}, "
+                f"per_host={settings.HTTP_POOL_LIMIT_PER_HOST})"
+            )
+
+    @classmethod
+    async def shutdown(cls):
+        if cls._session is not None and not cls._session.closed:
+            await cls._session.close()
+            logger.info("HTTP pool closed")
+        cls._session = None
+
+    @classmethod
+    async def get_session(cls) -> aiohttp.ClientSession:
+        # Lazily create the session for scripts that never run the FastAPI startup hook
+        if cls._session is None or cls._session.closed:
+            if cls._lock is None:
+                cls._lock = asyncio.Lock()
+            async with cls._lock:
+                if cls._session is None or cls._session.closed:
+                    await cls.startup()
+        return cls._session
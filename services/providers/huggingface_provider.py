@@ -1,6 +1,9 @@
 
-import aiohttp
 from core.config import settings
+from services.providers.http_session import HTTPSessionPool
+from services.providers.micro_batch import MicroBatcher
+from typing import Any, Dict, List
+import asyncio
 import logging
 
 logger = logging.getLogger("brandcraft.huggingface")
@@ -9,25 +12,52 @@ class HuggingFaceProvider:
     def __init__(self):
         self.api_url = "https://api-inference.huggingface.co/models/distilbert-base-uncased-finetuned-sst-2-english"
         self.headers = {"Authorization": f"Bearer {settings.HF_API_KEY}"}
+        # Micro-batching: concurrent single-text calls share one upstream request
+        self._batcher = MicroBatcher(
+            self._post_batch, settings.HF_BATCH_WINDOW_MS, settings.HF_MAX_BATCH_SIZE,
+            self._request_timeout(settings.HF_MAX_BATCH_SIZE) + 1
+        )
+
+    @staticmethod
+    def _parse(scores: Any) -> Dict[str, Any]:
+        # Each input yields [{'label': 'POSITIVE', 'score': 0.99}, {'label': 'NEGATIVE', ...}]
+        if isinstance(scores, list) and scores:
+            top_sentiment = max(scores, key=lambda s: s.get("score", 0.0))
+            return {
+                "label": top_sentiment["label"].lower(),
+                "confidence": top_sentiment["score"]
+            }
+        return {"label": "neutral", "confidence": 0.0}
+
+    @staticmethod
+    def _request_timeout(count: int) -> float:
+        return 10 + count * 0.1
+
+    async def _post_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        try:
+            session = await HTTPSessionPool.get_session()
+            async with session.post(self.api_url, headers=self.headers, json={"inputs": texts}, timeout=self._request_timeout(len(texts))) as response:
+                if response.status != 200:
+                    error_data = await response.text()
+                    logger.error(f"HF Error: {error_data}")
+                    return [{"label": "neutral", "confidence": 0.0, "error": True} for _ in texts]
+                
+                result = await response.json()
+                if isinstance(result, list) and len(result) == len(texts):
+                    return [self._parse(scores) for scores in result]
+                logger.error(f"HF returned {len(result) if isinstance(result, list) else 'invalid'} results for {len(texts)} inputs")
+                return [{"label": "neutral", "confidence": 0.0, "error": True} for _ in texts]
+        except Exception as e:
+            logger.error(f"HF Provider Exception: {str(e)}")
+            return [{"label": "neutral", "confidence": 0.0, "error": str(e)} for _ in texts]
+
+    async def analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        results: List[Dict[str, Any]] = []
+        size = settings.HF_MAX_BATCH_SIZE
+        chunks = [texts[i:i + size] for i in range(0, len(texts), size)]
+        for chunk_results in await asyncio.gather(*(self._post_batch(c) for c in chunks)):
+            results.extend(chunk_results)
+        return results
 
     async def analyze_sentiment(self, text: str) -> dict:
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(self.api_url, headers=self.headers, json={"inputs": text}, timeout=10) as response:
-                    if response.status != 200:
-                        error_data = await response.text()
-                        logger.error(f"HF Error: {error_data}")
-                        return {"label": "neutral", "confidence": 0.0, "error": True}
-                    
-                    result = await response.json()
-                    # Typically returns [[{'label': 'POSITIVE', 'score': 0.99}, ...]]
-                    if isinstance(result, list) and len(result) > 0:
-                        top_sentiment = result[0][0]
-                        return {
-                            "label": top_sentiment["label"].lower(),
-                            "confidence": top_sentiment["score"]
-                        }
-                    return {"label": "neutral", "confidence": 0.0}
-            except Exception as e:
-                logger.error(f"HF Provider Exception: {str(e)}")
-                return {"label": "neutral", "confidence": 0.0, "error": str(e)}
+        return await self._batcher.submit(text)
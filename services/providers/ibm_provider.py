@@ -1,7 +1,8 @@
 
 from ibm_watsonx_ai.foundation_models import Model
 from core.config import settings
-import asyncio
+from services.providers.executor import ProviderExecutor
+import threading
 import logging
 
 logger = logging.getLogger("brandcraft.ibm")
@@ -14,25 +15,32 @@ class IBMProvider:
         }
         self.project_id = settings.IBM_PROJECT_ID
         self.model_id = "google/flan-ul2" # Representative performant model
+        self.executor = ProviderExecutor.for_provider(
+            "ibm", settings.IBM_EXECUTOR_WORKERS, settings.IBM_CALL_TIMEOUT
+        )
+        self._model = None
+        self._model_lock = threading.Lock()
+
+    def _get_model(self) -> Model:
+        # Building a Model authenticates against watsonx, so do it once per provider
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = Model(
+                        model_id=self.model_id,
+                        params={
+                            "decoding_method": "sample",
+                            "max_new_tokens": 512,
+                            "temperature": 0.7
+                        },
+                        credentials=self.credentials,
+                        project_id=self.project_id
+                    )
+        return self._model
 
     async def branding_advisor(self, prompt: str) -> str:
         try:
-            loop = asyncio.get_event_loop()
-            
-            def call_watsonx():
-                model = Model(
-                    model_id=self.model_id,
-                    params={
-                        "decoding_method": "sample",
-                        "max_new_tokens": 512,
-                        "temperature": 0.7
-                    },
-                    credentials=self.credentials,
-                    project_id=self.project_id
-                )
-                return model.generate_text(prompt)
-
-            response = await loop.run_in_executor(None, call_watsonx)
+            response = await self.executor.run(lambda: self._get_model().generate_text(prompt))
             return response
         except Exception as e:
             logger.error(f"IBM Watsonx AI Error: {str(e)}")
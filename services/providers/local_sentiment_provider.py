@@ -0,0 +1,67 @@
+
+from core.config import settings
+from services.providers.executor import ProviderExecutor
+from services.providers.micro_batch import MicroBatcher
+from typing import Any, Dict, List
+import threading
+import logging
+
+logger = logging.getLogger("brandcraft.local_sentiment")
+
+class LocalSentimentProvider:
+    """
+    In-process CPU inference for the SST-2 sentiment model, loaded once per worker.
+
+    Requires the optional `transformers` + `torch` stack, or `optimum[onnxruntime]`
+    when LOCAL_SENTIMENT_ONNX is enabled. Single-text calls share the HF
+    micro-batch window, so concurrent requests become one forward pass instead
+    of queueing one by one on the (usually single-thread) executor.
+    """
+
+    def __init__(self):
+        self.model_id = settings.LOCAL_SENTIMENT_MODEL
+        self.executor = ProviderExecutor.for_provider(
+            "local-sentiment", settings.LOCAL_SENTIMENT_THREADS, settings.LOCAL_SENTIMENT_TIMEOUT
+        )
+        self._pipeline = None
+        self._load_lock = threading.Lock()
+        self._batcher = MicroBatcher(
+            self.analyze_batch, settings.HF_BATCH_WINDOW_MS, settings.HF_MAX_BATCH_SIZE,
+            settings.LOCAL_SENTIMENT_TIMEOUT + 1
+        )
+
+    def _load(self):
+        if self._pipeline is not None:
+            return self._pipeline
+        with self._load_lock:
+            if self._pipeline is None:
+                from transformers import AutoTokenizer, pipeline
+
+                tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+                if settings.LOCAL_SENTIMENT_ONNX:
+                    from optimum.onnxruntime import ORTModelForSequenceClassification
+                    model = ORTModelForSequenceClassification.from_pretrained(self.model_id, export=True)
+                else:
+                    from transformers import AutoModelForSequenceClassification
+                    model = AutoModelForSequenceClassification.from_pretrained(self.model_id)
+                self._pipeline = pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, device=-1)
+                logger.info(f"Loaded local sentiment model {self.model_id} (onnx={settings.LOCAL_SENTIMENT_ONNX})")
+        return self._pipeline
+
+    async def warmup(self):
+        await self.executor.run(self._load, timeout=settings.LOCAL_SENTIMENT_LOAD_TIMEOUT)
+
+    def _infer(self, texts: List[str]) -> List[Dict[str, Any]]:
+        classifier = self._load()
+        outputs = classifier(texts, batch_size=settings.HF_MAX_BATCH_SIZE, truncation=True)
+        return [{"label": o["label"].lower(), "confidence": float(o["score"])} for o in outputs]
+
+    async def analyze_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        try:
+            return await self.executor.run(lambda: self._infer(texts))
+        except Exception as e:
+            logger.error(f"Local sentiment inference failed: {str(e)}")
+            return [{"label": "neutral", "confidence": 0.0, "error": str(e)} for _ in texts]
+
+    async def analyze_sentiment(self, text: str) -> dict:
+        return await self._batcher.submit(text)
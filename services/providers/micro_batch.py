@@ -0,0 +1,64 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+
+BatchRunner = Callable[[List[str]], Awaitable[List[Dict[str, Any]]]]
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text calls into one batch call: texts arriving
+    within `window_ms` of the first (or until `max_size` are waiting) share a
+    `run_batch` invocation. Every caller is resolved, with an error result if
+    the batch fails or returns short, and no caller waits longer than `timeout`.
+    """
+
+    def __init__(self, run_batch: BatchRunner, window_ms: float, max_size: int, timeout: float):
+        self.run_batch = run_batch
+        self.window_ms = window_ms
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_ms / 1000.0, self._flush)
+        # Bounded even if the dispatch is lost: never hold an admission slot indefinitely
+        try:
+            return await asyncio.wait_for(future, timeout=self.window_ms / 1000.0 + self.timeout)
+        except asyncio.TimeoutError:
+            return {"label": "neutral", "confidence": 0.0, "error": "Sentiment batch timed out"}
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self._dispatch(batch))
+            # Referenced until done so the loop cannot garbage-collect it mid-flight
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]):
+        try:
+            results = await self.run_batch([text for text, _ in batch])
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        except BaseException as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else RuntimeError("Sentiment batch cancelled"))
+            if not isinstance(e, Exception):
+                raise
+        finally:
+            # Anything still unresolved (e.g. a short result list) fails rather than hangs
+            for _, future in batch:
+                if not future.done():
+                    future.set_result({"label": "neutral", "confidence": 0.0, "error": True})
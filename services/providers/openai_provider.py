@@ -1,8 +1,11 @@
 
-import aiohttp
+import os
+import json
 import logging
+from typing import Any, AsyncIterator, Dict
 from core.config import settings
 from services.providers.base import AIProvider
+from services.providers.http_session import HTTPSessionPool
 from tenacity import retry, stop_after_attempt, wait_exponential
 
 logger = logging.getLogger("brandcraft.openai")
@@ -31,24 +34,80 @@ class OpenAIProvider(AIProvider):
             "messages": [{"role": "user", "content": prompt}],
             "temperature": 0.7
         }
+        if kwargs.get("prefix_key"):
+            # Routes requests sharing a brand-context prefix to the same prompt cache
+            payload["prompt_cache_key"] = kwargs["prefix_key"]
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(self.url, headers=headers, json=payload, timeout=30) as response:
-                if response.status != 200:
-                    err = await response.text()
-                    logger.error(f"OpenAI Error: {err}")
-                    raise Exception(f"OpenAI API Error: {response.status}")
-                
-                data = await response.json()
-                usage = data.get("usage", {})
-                
-                return {
-                    "text": data["choices"][0]["message"]["content"],
-                    "provider": "openai",
-                    "model": self.model_name,
-                    "usage": {
-                        "prompt_tokens": usage.get("prompt_tokens", 0),
-                        "completion_tokens": usage.get("completion_tokens", 0),
-                        "total_tokens": usage.get("total_tokens", 0)
-                    }
+        session = await HTTPSessionPool.get_session()
+        async with session.post(self.url, headers=headers, json=payload, timeout=30) as response:
+            if response.status != 200:
+                err = await response.text()
+                logger.error(f"OpenAI Error: {err}")
+                raise Exception(f"OpenAI API Error: {response.status}")
+            
+            data = await response.json()
+            usage = data.get("usage", {})
+            
+            return {
+                "text": data["choices"][0]["message"]["content"],
+                "provider": "openai",
+                "model": self.model_name,
+                "usage": {
+                    "prompt_tokens": usage.get("prompt_tokens", 0),
+                    "completion_tokens": usage.get("completion_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0)
                 }
+            }
+
+    async def stream_text(self, prompt: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        if not self.api_key:
+            raise ValueError("OpenAI API Key missing")
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        
+        payload = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.7,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        if kwargs.get("prefix_key"):
+            payload["prompt_cache_key"] = kwargs["prefix_key"]
+
+        session = await HTTPSessionPool.get_session()
+        async with session.post(self.url, headers=headers, json=payload, timeout=60) as response:
+            if response.status != 200:
+                err = await response.text()
+                logger.error(f"OpenAI Error: {err}")
+                raise Exception(f"OpenAI API Error: {response.status}")
+
+            usage = {}
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                for choice in chunk.get("choices", []):
+                    delta = choice.get("delta", {}).get("content")
+                    if delta:
+                        yield {"delta": delta}
+
+            yield {
+                "done": True,
+                "provider": "openai",
+                "model": self.model_name,
+                "usage": {
+                    "prompt_tokens": usage.get("prompt_tokens", 0),
+                    "completion_tokens": usage.get("completion_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0)
+                }
+            }
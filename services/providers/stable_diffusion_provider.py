@@ -1,8 +1,7 @@
 
-import aiohttp
-import os
-import uuid
 from core.config import settings
+from services.providers.http_session import HTTPSessionPool
+from services.image_storage import ImageStorage
 import logging
 
 logger = logging.getLogger("brandcraft.sd")
@@ -27,26 +26,19 @@ class StableDiffusionProvider:
             "steps": 30,
         }
 
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(self.api_url, headers=self.headers, json=payload, timeout=60) as response:
-                    if response.status != 200:
-                        error_data = await response.text()
-                        logger.error(f"SD API Error: {error_data}")
-                        raise Exception(f"SD API Error: {response.status}")
-                    
-                    data = await response.json()
-                    image_base64 = data["artifacts"][0]["base64"]
-                    
-                    # Save locally
-                    filename = f"logo_{uuid.uuid4().hex}.png"
-                    filepath = os.path.join(settings.STATIC_DIR, filename)
-                    
-                    import base64
-                    with open(filepath, "wb") as f:
-                        f.write(base64.b64decode(image_base64))
-                    
-                    return f"/static/{filename}"
-            except Exception as e:
-                logger.error(f"SD Provider Exception: {str(e)}")
-                raise
+        session = await HTTPSessionPool.get_session()
+        try:
+            async with session.post(self.api_url, headers=self.headers, json=payload, timeout=60) as response:
+                if response.status != 200:
+                    error_data = await response.text()
+                    logger.error(f"SD API Error: {error_data}")
+                    raise Exception(f"SD API Error: {response.status}")
+                
+                data = await response.json()
+                image_base64 = data["artifacts"][0]["base64"]
+
+            # Decoded, hashed and written off the event loop; identical images share one file
+            return await ImageStorage.save_base64(image_base64, "png")
+        except Exception as e:
+            logger.error(f"SD Provider Exception: {str(e)}")
+            raise
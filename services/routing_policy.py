@@ -0,0 +1,144 @@
+
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List
+import asyncio
+import logging
+import time
+from core.config import settings
+from services.providers.base import AIProvider
+from services.circuit_breaker import CircuitBreaker
+from services.admission import AdmissionController, AdmissionTimeout
+
+logger = logging.getLogger("brandcraft.routing")
+
+SEQUENTIAL = "sequential"
+HEDGED = "hedged"
+RACE = "race"
+MODES = (SEQUENTIAL, HEDGED, RACE)
+
+ProviderCall = Callable[[AIProvider], Awaitable[Dict[str, Any]]]
+
+def provider_key(provider: AIProvider) -> str:
+    return f"{type(provider).__name__}:{getattr(provider, 'model_name', '')}"
+
+class LatencyTracker:
+    """Rolling window of successful call latencies per provider."""
+    _windows: Dict[str, Deque[float]] = {}
+
+    @classmethod
+    def record(cls, key: str, seconds: float):
+        window = cls._windows.get(key)
+        if window is None:
+            window = cls._windows[key] = deque(maxlen=settings.ROUTING_LATENCY_WINDOW)
+        window.append(seconds)
+
+    @classmethod
+    def percentile(cls, key: str, pct: float) -> float:
+        window = cls._windows.get(key)
+        if not window:
+            return 0.0
+        ordered = sorted(window)
+        index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    @classmethod
+    def samples(cls, key: str) -> int:
+        return len(cls._windows.get(key, ()))
+
+class RoutingPolicy:
+    """
+    Chooses how a provider chain is executed for a task:
+    - sequential: try each provider in order, next one only after a failure
+    - hedged: fire the next provider once the current one exceeds its p95 latency
+    - race: fire every provider at once
+    The first success wins and the remaining calls are cancelled.
+    """
+    _task_modes: Dict[str, str] = None
+
+    @classmethod
+    def mode_for(cls, task: str) -> str:
+        if cls._task_modes is None:
+            modes = {}
+            for item in filter(None, settings.ROUTING_TASK_MODES.split(",")):
+                name, _, mode = item.partition(":")
+                if mode.strip() in MODES:
+                    modes[name.strip()] = mode.strip()
+                else:
+                    logger.warning(f"Ignoring unknown routing mode '{mode}' for task '{name}'")
+            cls._task_modes = modes
+        return cls._task_modes.get(task, settings.ROUTING_DEFAULT_MODE)
+
+    @staticmethod
+    def hedge_delay(provider: AIProvider) -> float:
+        key = provider_key(provider)
+        if LatencyTracker.samples(key) < settings.HEDGE_MIN_SAMPLES:
+            return settings.HEDGE_DEFAULT_DELAY
+        p95 = LatencyTracker.percentile(key, 95)
+        return max(settings.HEDGE_MIN_DELAY, min(settings.HEDGE_MAX_DELAY, p95))
+
+    @staticmethod
+    async def _timed(provider: AIProvider, call: ProviderCall) -> Dict[str, Any]:
+        key = provider_key(provider)
+        breaker = CircuitBreaker.for_key(key)
+        started = time.monotonic()
+        try:
+            async with AdmissionController.slot(key):
+                # Queue wait is the scheduler's, not the provider's: time only the call
+                started = time.monotonic()
+                result = await call(provider)
+        except (asyncio.CancelledError, AdmissionTimeout):
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(False, time.monotonic() - started)
+            raise
+        latency = time.monotonic() - started
+        breaker.record(True, latency)
+        LatencyTracker.record(key, latency)
+        return result
+
+    @classmethod
+    async def execute(cls, mode: str, providers: List[AIProvider], call: ProviderCall) -> Dict[str, Any]:
+        remaining = list(providers)
+        pending: Dict[asyncio.Future, AIProvider] = {}
+        last_launched = None
+
+        def launch() -> bool:
+            # Skip providers whose circuit is open instead of spending retries on them
+            nonlocal last_launched
+            while remaining:
+                provider = remaining.pop(0)
+                if not CircuitBreaker.for_key(provider_key(provider)).allow():
+                    continue
+                pending[asyncio.ensure_future(cls._timed(provider, call))] = provider
+                last_launched = provider
+                return True
+            return False
+
+        launch()
+        if mode == RACE:
+            while launch():
+                pass
+
+        try:
+            while pending:
+                timeout = None
+                if mode == HEDGED and remaining:
+                    timeout = cls.hedge_delay(last_launched)
+                done, _ = await asyncio.wait(pending.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"Hedging: {provider_key(last_launched)} exceeded {timeout:.2f}s, firing next provider")
+                    launch()
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    logger.warning(f"Text Provider failed ({provider_key(provider)}): {str(task.exception())}")
+                # A failure frees the slot: move straight on to the next provider
+                if remaining:
+                    launch()
+            raise RuntimeError("All providers failed or have open circuits")
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,142 @@
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import time
+from core.config import settings
+from database import connection, crud
+from database.rollups import UsageRollups
+
+logger = logging.getLogger("brandcraft.usage")
+
+class UsageLogWriter:
+    """
+    Buffers UsageLog rows in a bounded in-process queue and bulk-inserts them
+    from a background task. A batch is flushed when it reaches
+    USAGE_LOG_BATCH_SIZE rows or USAGE_LOG_FLUSH_INTERVAL seconds after its
+    first row, and the queue is drained on shutdown.
+
+    When the queue is full, USAGE_LOG_OVERFLOW decides: "block" waits up to
+    USAGE_LOG_BLOCK_TIMEOUT for space before dropping, "drop" drops at once.
+    """
+    _queue: Optional[asyncio.Queue] = None
+    _task: Optional[asyncio.Task] = None
+    # Rows the background task had taken off the queue when it was cancelled
+    _unflushed: List[Any] = []
+    stats: Dict[str, int] = {
+        "enqueued": 0,
+        "written": 0,
+        "dropped": 0,
+        "overflows": 0,
+        "flushes": 0,
+        "failed": 0
+    }
+
+    @classmethod
+    async def start(cls):
+        if cls._task is not None:
+            return
+        cls._queue = asyncio.Queue(maxsize=settings.USAGE_LOG_QUEUE_SIZE)
+        cls._task = asyncio.create_task(cls._run())
+        logger.info(f"Usage log writer started (batch={settings.USAGE_LOG_BATCH_SIZE}, interval={settings.USAGE_LOG_FLUSH_INTERVAL}s)")
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is None:
+            return
+        cls._task.cancel()
+        await asyncio.gather(cls._task, return_exceptions=True)
+        cls._task = None
+        # Graceful drain of whatever is still buffered
+        remaining, cls._unflushed = cls._unflushed, []
+        while not cls._queue.empty():
+            remaining.append(cls._queue.get_nowait())
+        if remaining:
+            await cls._flush(remaining)
+        logger.info(f"Usage log writer stopped ({cls.stats['written']} rows written, {cls.stats['dropped']} dropped)")
+
+    @classmethod
+    async def log(
+        cls,
+        user_id: str,
+        endpoint: str,
+        method: str,
+        status: int,
+        duration: float,
+        credits: int,
+        ip: str,
+        ai_metadata: dict = None
+    ):
+        row = crud.build_usage_log(user_id, endpoint, method, status, duration, credits, ip, ai_metadata)
+        if cls._task is None:
+            # Writer not running (scripts, tests): fall back to a direct write
+            await cls._flush([row])
+            return
+        await cls._enqueue(row)
+
+    @classmethod
+    async def log_batch(cls, entries: List[Dict[str, Any]]):
+        """Logs several rows at once (keyword arguments of log() per entry); one write when the writer is off."""
+        rows = [crud.build_usage_log(**entry) for entry in entries]
+        if cls._task is None:
+            if rows:
+                await cls._flush(rows)
+            return
+        for row in rows:
+            await cls._enqueue(row)
+
+    @classmethod
+    async def _enqueue(cls, row: Any):
+        try:
+            cls._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            cls.stats["overflows"] += 1
+            if settings.USAGE_LOG_OVERFLOW != "block":
+                cls.stats["dropped"] += 1
+                return
+            try:
+                await asyncio.wait_for(cls._queue.put(row), timeout=settings.USAGE_LOG_BLOCK_TIMEOUT)
+            except asyncio.TimeoutError:
+                cls.stats["dropped"] += 1
+                logger.warning("Usage log queue saturated, dropping row")
+                return
+        cls.stats["enqueued"] += 1
+
+    @classmethod
+    async def _run(cls):
+        while True:
+            batch = []
+            try:
+                batch.append(await cls._queue.get())
+                deadline = time.monotonic() + settings.USAGE_LOG_FLUSH_INTERVAL
+                while len(batch) < settings.USAGE_LOG_BATCH_SIZE:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(cls._queue.get(), timeout=timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await cls._flush(batch)
+            except asyncio.CancelledError:
+                # Shutdown while collecting or flushing: hand the batch to stop().
+                # Kept aside rather than requeued, since producers may have refilled the queue
+                cls._unflushed.extend(batch)
+                raise
+
+    @classmethod
+    async def _flush(cls, rows: List[Any]):
+        for attempt in range(2):
+            try:
+                async with connection.AsyncSessionLocal() as db:
+                    db.add_all(rows)
+                    await UsageRollups.apply(db, UsageRollups.aggregate(rows))
+                    await db.commit()
+                cls.stats["written"] += len(rows)
+                cls.stats["flushes"] += 1
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Usage log flush failed (attempt {attempt + 1}): {str(e)}")
+        cls.stats["failed"] += len(rows)
@@ -5,9 +5,14 @@ set -e
 echo "[START] Starting Nginx..."
 nginx -g "daemon on;"
 
+echo "[START] Applying database migrations..."
+# Once, before the workers fork; their own run_migrations() call then finds nothing to do
+python -m database.migrations
+
 echo "[START] Starting Gunicorn with Uvicorn workers..."
 # Calculate workers based on CPU cores (2 * cores + 1)
-WORKERS=${WORKERS:-$((2 * $(nproc) + 1))}
+# Exported so settings can tell a multi-worker deployment apart (e.g. RATE_LIMIT_BACKEND)
+export WORKERS=${WORKERS:-$((2 * $(nproc) + 1))}
 
 exec gunicorn main:app \
     --workers $WORKERS \
@@ -20,10 +20,14 @@ def check_system():
             print(f"[2] Directory {d}: OK")
 
     # 3. DB Check
-    from database.connection import engine
+    from database.connection import engine, Base
+    from database.migrations import run_migrations
     try:
         engine.connect()
         print("[3] Database Connectivity: OK")
+        Base.metadata.create_all(bind=engine)
+        applied = run_migrations(engine)
+        print(f"[3] Migrations: {', '.join(applied) if applied else 'up to date'}")
     except Exception as e:
         print(f"[!] Database Connection Failed: {e}")
 
@@ -36,6 +40,11 @@ def check_system():
     except:
         print("[!] Critical: No write permissions for logs/static")
 
+    # 5. Password hashing cost
+    from modules.auth.hashing import PasswordHasher
+    bench = PasswordHasher.benchmark(target_ms=250.0, min_rounds=settings.BCRYPT_ROUNDS, max_rounds=settings.BCRYPT_ROUNDS, samples=1)
+    print(f"[5] bcrypt cost {settings.BCRYPT_ROUNDS}: {bench['timings_ms'][settings.BCRYPT_ROUNDS]} ms/hash (tune: python -m modules.auth.hashing)")
+
     print(">>> DIAGNOSTICS COMPLETE")
 
 if __name__ == "__main__":